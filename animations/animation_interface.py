@@ -1,10 +1,13 @@
-from zsquirrel.animations.animations import Animation, AnimationLayer, AnimationStep, AnimationMachine
+import json
+from zsquirrel.animations.animations import Animation, AnimationLayer, AnimationStep, AnimationMachine, AnimationSet
 from zsquirrel.utils.geometry import Rect
 from zsquirrel.graphics import ImageSectionGraphics, GraphicsInterface
 from zsquirrel.utils.meters import Meter
 
 
 class AnimationInterface(GraphicsInterface):
+    LOADED_ANIMATION_SETS = {}
+
     def __init__(self, *args):
         super(AnimationInterface, self).__init__(*args)
 
@@ -23,6 +26,7 @@ class AnimationInterface(GraphicsInterface):
         machine.sounds = self.get_sounds_dict(data["sounds"])
 
         entity.update_methods.append(machine.update)
+        entity.reset_methods.append(machine.reset)
         entity.graphics.get_state = machine.get_state
         machine.set_state("default")
 
@@ -54,8 +58,15 @@ class AnimationInterface(GraphicsInterface):
         )
 
     def set_animations_left_right(self, entity, sprite_sheet, animation_data):
-        data = self.context.load_resource(animation_data)
+        key = self.get_animation_set_key(sprite_sheet, animation_data, left_right=True)
+
+        animation_set = self.get_animation_set(
+            key, sprite_sheet, animation_data, left_right=True
+        )
+        self.apply_animation_set(entity, animation_set)
 
+    @staticmethod
+    def add_left_animations(data):
         animations = data["animations"]
         names = [a["name"] for a in animations]
         for name in names:
@@ -67,8 +78,6 @@ class AnimationInterface(GraphicsInterface):
                     "mirror": [True, False]
                 })
 
-        self.set_animations(entity, sprite_sheet, data)
-
     def set_animation_machine_left_right(self, entity, machine_data):
         machine = self.set_animation_machine(entity, machine_data)
 
@@ -84,21 +93,69 @@ class AnimationInterface(GraphicsInterface):
         entity.graphics.get_state = get_state
 
     def set_animations(self, entity, sprite_sheet, data):
-        if type(data) is str:
-            data = self.context.load_resource(data)
+        key = self.get_animation_set_key(sprite_sheet, data)
 
-        scale = data.get("scale", 1)
-        image = self.context.load_resource(sprite_sheet)
-        if scale != 1:
-            image = image.get_scaled(scale)
+        animation_set = self.get_animation_set(key, sprite_sheet, data)
+        self.apply_animation_set(entity, animation_set)
+
+    @staticmethod
+    def get_animation_set_key(sprite_sheet, data, left_right=False):
+        if type(data) is not str:
+            data = json.dumps(data, sort_keys=True)
+
+        return sprite_sheet, data, left_right
+
+    def get_animation_set(self, key, sprite_sheet, data, left_right=False):
+        """
+        Returns the AnimationSet stored under a content key in the
+        LOADED_ANIMATION_SETS dict, loading and compiling it first if needed.
+        Every entity that uses the same sprite sheet and animation data
+        shares a single AnimationSet.
 
-        graphics = AnimationGraphics(entity, image)
+        :param key: hashable key returned by get_animation_set_key()
+        :param sprite_sheet: str, file name of the sprite sheet image
+        :param data: str or dict, animation data or its file name
+        :param left_right: bool, add a mirrored '_left' animation for each
+            animation in the data
+
+        :return: AnimationSet object
+        """
+        loaded = AnimationInterface.LOADED_ANIMATION_SETS
+
+        if key not in loaded:
+            if type(data) is str:
+                data = self.context.load_resource(data)
+
+            if left_right:
+                self.add_left_animations(data)
+
+            scale = data.get("scale", 1)
+            image = self.context.load_resource(sprite_sheet)
+            if scale != 1:
+                image = image.get_scaled(scale)
+
+            animations = self.get_animations(data)
+            frames = self.get_compiled_animations(image, animations)
+
+            loaded[key] = AnimationSet(image, animations, frames)
+
+        return loaded[key]
+
+    @staticmethod
+    def apply_animation_set(entity, animation_set):
+        graphics = AnimationGraphics(entity, animation_set.image)
         entity.graphics = graphics
 
-        graphics.animations = self.get_animations(data)
+        graphics.animations = animation_set.animations
+        graphics.frames = animation_set.frames
         entity.update_methods.append(graphics.update)
+        entity.reset_methods.append(graphics.reset_meter)
         graphics.reset_meter()
 
+    @staticmethod
+    def clear_animation_sets():
+        AnimationInterface.LOADED_ANIMATION_SETS = {}
+
     def get_animations(self, data):
         animations = {}
         scale = data.get("scale", 1)
@@ -238,12 +295,71 @@ class AnimationInterface(GraphicsInterface):
 
         return Animation(name, steps, data)
 
+    @staticmethod
+    def get_compiled_layer(image, layer):
+        rect = Rect(layer.size, layer.position)
+        section = image.get_transformed(rect, layer.mirror, layer.rotate)
+
+        ox, oy = layer.offset
+        if layer.rotate:
+            w, h = layer.size
+            rw, rh = section.get_size()
+            ox += (w - rw) / 2
+            oy += (h - rh) / 2
+
+        return section, (ox, oy)
+
+    @staticmethod
+    def get_compiled_frames(image, animation, compiled_steps=None):
+        """
+        Bakes each step of an Animation into a tuple of pre-cut, transformed
+        sections and draw offsets, then returns a list of those tuples
+        indexed by frame number, matching Animation.get_current_step().
+
+        :param image: Image object, the sprite sheet
+        :param animation: Animation object
+        :param compiled_steps: None or dict, shared between animations
+            so that steps reused by reversed animations are only baked once
+
+        :return: tuple, (((Image, (ox, oy)), ...), ...)
+        """
+        if compiled_steps is None:
+            compiled_steps = {}
+
+        get_layer = AnimationInterface.get_compiled_layer
+        steps = {}
+
+        for step in animation.steps:
+            key = id(step)
+            if key not in compiled_steps:
+                compiled_steps[key] = step, tuple(
+                    get_layer(image, layer) for layer in step.layers
+                )
+
+            steps[key] = compiled_steps[key][1]
+
+        return tuple(
+            steps[id(animation.get_current_step(frame))]
+            for frame in range(animation.get_frame_count())
+        )
+
+    @staticmethod
+    def get_compiled_animations(image, animations):
+        compiled_steps = {}
+
+        return {
+            name: AnimationInterface.get_compiled_frames(
+                image, animations[name], compiled_steps
+            ) for name in animations
+        }
+
 
 class AnimationGraphics(ImageSectionGraphics):
     def __init__(self, entity, image):
         super(AnimationGraphics, self).__init__(entity, image)
 
         self.animations = {}
+        self.frames = {}
         self.animation_meter = Meter(
             "{} animation meter".format(entity.name),
             0, 0, 1
@@ -269,19 +385,22 @@ class AnimationGraphics(ImageSectionGraphics):
 
     def update_image_layers(self):
         state = self.get_animation_state()
-        self.layers = []
+        self.layers = ()
 
-        if state in self.animations:
-            animation = self.animations[state]
-            step = animation.get_current_step(self.animation_meter.value)
+        if state in self.frames:
+            frames = self.frames[state]
+            frame = int(self.animation_meter.value)
+
+            if 0 <= frame < len(frames):
+                self.layers = frames[frame]
 
-            for layer in step.layers:
-                rect = Rect(layer.size, layer.position)
-                offset = layer.offset
-                mirror = layer.mirror
-                rotate = layer.rotate
+    # section = (Image, draw_offset)
+    # sections are pre-cut and transformed by AnimationInterface
+    def get_section_args(self, section):
+        image, (ox, oy) = section
+        px, py = self.entity.position
 
-                self.layers.append((rect, offset, mirror, rotate))
+        return image, (px + ox, py + oy)
 
     def reset_meter(self):
         state = self.get_animation_state()
@@ -1,4 +1,6 @@
+from bisect import bisect_left, bisect_right
 from copy import copy
+from itertools import accumulate
 import zsquirrel.constants as con
 from zsquirrel.utils.state_machines import StateMachine
 
@@ -13,30 +15,55 @@ class Animation:
 
         self.data = data
 
+        self.frame_count = 0
+        self.cumulative_durations = []
+        self.frame_steps = []
+        self.set_frame_index()
+
+    def set_frame_index(self):
+        """
+        Precomputes the cumulative duration of each step, plus a dense table
+        of step indexes for each frame when every step has an integer
+        duration. This should be called again if the 'steps' list or any
+        step duration is changed after initialization.
+        """
+        cumulative = list(accumulate(s.duration for s in self.steps))
+
+        self.cumulative_durations = cumulative
+        self.frame_count = cumulative[-1] if cumulative else 0
+        self.frame_steps = []
+
+        if all(type(s.duration) is int for s in self.steps):
+            self.frame_steps = [
+                bisect_right(cumulative, f) for f in range(self.frame_count)
+            ]
+
+    # frame n returns the first step whose cumulative duration is >= n
     def get_current_step(self, frame_num):
-        for s in self.steps:
-            d = s.duration
-            frame_num -= d
-            if frame_num <= 0:
-                return s
+        frame_steps = self.frame_steps
 
+        if type(frame_num) is int and 0 < frame_num <= len(frame_steps):
+            return self.steps[frame_steps[frame_num - 1]]
+
+        i = bisect_left(self.cumulative_durations, frame_num)
+
+        if i < len(self.steps):
+            return self.steps[i]
+
+    # frame n returns the index of the first step whose cumulative duration is > n
     def get_step_index(self, frame_num):
-        i = 0
-        for d in [s.duration for s in self.steps]:
-            frame_num -= d
+        frame_steps = self.frame_steps
 
-            if frame_num < 0:
-                return i
+        if type(frame_num) is int and 0 <= frame_num < len(frame_steps):
+            return frame_steps[frame_num]
 
-            i += 1
+        i = bisect_right(self.cumulative_durations, frame_num)
 
-    def get_frame_count(self):
-        i = 0
-        for s in self.steps:
-            d = s.duration
-            i += d
+        if i < len(self.steps):
+            return i
 
-        return i
+    def get_frame_count(self):
+        return self.frame_count
 
     def get_mirror_animation(self, name, mirror):
         new_steps = [
@@ -131,6 +158,31 @@ class AnimationLayer:
         )
 
 
+class AnimationSet:
+    """
+    An AnimationSet holds the sprite sheet, the Animation objects and the
+    compiled frame tables for one sprite sheet and animation data pair.
+    A single AnimationSet is shared by every entity that uses that pair,
+    so it should be treated as read only. Playback state such as the
+    animation meter is stored on each entity's AnimationGraphics object.
+    """
+    def __init__(self, image, animations, frames):
+        """
+        :param image: Image object, the (scaled) sprite sheet
+        :param animations: dict, {name: Animation, ...}
+        :param frames: dict, {name: compiled frame table, ...}
+        """
+        self.image = image
+        self.animations = animations
+        self.frames = frames
+
+    def __repr__(self):
+        return "{}: {}".format(
+            self.__class__.__name__,
+            ", ".join(self.animations)
+        )
+
+
 class AnimationMachine(StateMachine):
     def __init__(self, entity, states):
         super(AnimationMachine, self).__init__(states)
@@ -152,6 +204,15 @@ class AnimationMachine(StateMachine):
         self.entity.graphics.reset_meter()
         self.buffer_state = None
 
+    # called by Entity.reset(), returns to the default state without
+    # sending a 'change_state' event
+    def reset(self):
+        self.handle_sound_off(self.get_state())
+        super(AnimationMachine, self).set_state("default")
+
+        self.buffer_state = None
+        self.entity.graphics.reset_meter()
+
     def animation_done(self):
         return self.entity.graphics.animation_cycles > 0
 
@@ -45,6 +45,7 @@ CONDITIONS = "command_conditions"
 CONTEXT = "context"
 GAME = "game"
 ENVIRONMENT = "environment"
+LOAD_JOB = "load_job"
 
 # context.populate API
 SET_ = "set_"
@@ -53,6 +54,9 @@ GROUP = "group"
 GROUPS = "groups"
 SPRITES = "sprites"
 LAYERS = "layers"
+POOLS = "pools"
+POOL_SIZE = "pool_size"
+COMPILED_ENVIRONMENT = "compiled_environment"
 
 INIT_ORDER = "init_order"
 INIT_DATA = "init_data"
@@ -77,6 +81,8 @@ RESOURCES = "resources"
 JSON = "json"
 IMAGES = "images"
 SOUNDS = "sounds"
+FONTS = "fonts"
+PRE_RENDERS = "pre_renders"
 
 # File extensions
 IMAGE_EXT = "gif", "jpg", "bmp", "png"
@@ -99,6 +105,13 @@ ON_ = "on_"
 SPAWN = "spawn"
 DEATH = "death"
 DEAD = "dead"
+CONTACT_BEGIN = "contact_begin"
+CONTACT_PERSIST = "contact_persist"
+CONTACT_END = "contact_end"
+
+# Contact event keys
+OTHER = "other"
+CONTACT = "contact"
 
 # Geometry
 RECT = "rect"
@@ -2,6 +2,7 @@ import zsquirrel.constants as con
 from inspect import isclass
 from zsquirrel.entities import Group
 from zsquirrel.resources import ResourceLoader
+import pickle
 
 
 # This module defines a series of objects that are used to synchronize serial
@@ -17,6 +18,24 @@ from zsquirrel.resources import ResourceLoader
 # entry keys can call setter methods on Entity objects as well as various
 # auxiliary methods through application interfaces that can help create update
 # methods to give arbitrary runtime behavior to generic Entity objects.
+#
+# The steps taken by the EnvironmentLoader can also be recorded as a
+# 'compiled environment' (see Context.compile_environment) that can be
+# replayed directly on later loads.
+#
+# Sprites that are created and destroyed constantly, such as projectiles,
+# can be pre-instantiated by a SpritePool and reused (see SpritePool).
+
+# compiled environment operations
+ADD_ENTITY = "entity"
+ADD_GROUP = "group"
+SET_VALUE = "value"
+CALL_SETTER = "set"
+CALL_INTERFACE = "interface"
+ADD_POOL = "pool"
+
+# values of these types are never treated as 'model' keys
+CONSTANT_TYPES = int, float, bool, type(None)
 
 
 class Context:
@@ -65,11 +84,21 @@ class Context:
 
     def populate(self, data):
         """
-        Calls the EnvironmentLoader object's 'populate' method.
+        Calls the EnvironmentLoader object's 'populate' method, or its
+        'replay' method if the data is a compiled environment.
+
+        The resources referenced by the data are loaded first, in parallel,
+        by the EnvironmentLoader's 'load_resources' method.
 
         :param data: dict, entity/setter data
         """
-        self.env_loader.populate(data)
+        self.env_loader.load_resources(data)
+
+        if con.COMPILED_ENVIRONMENT in data:
+            self.env_loader.replay(data[con.COMPILED_ENVIRONMENT])
+
+        else:
+            self.env_loader.populate(data)
 
     def reset_model(self):
         """
@@ -98,6 +127,7 @@ class Context:
         :param data: dict, generic data to be added to 'model' dict
         """
         for item_name in data:
+            self.env_loader.record_value(data[item_name], SET_VALUE, item_name)
             item = self.get_value(data[item_name])
             self.model[item_name] = item
 
@@ -110,19 +140,12 @@ class Context:
         replaces them with live reference to object instances. An additional
         'sub' dict can be passed to provide contextual key/value substitutions.
 
+        Lists and tuples are returned as new lists, while dicts are updated in
+        place. Numbers, bools and None are never treated as keys.
+
         :param value: obj, generic 'value' checked against keys in the 'model' dict
         :param sub: dict, optional set of key/value substitutions
         """
-        def get(k):
-            if k in self.model:
-                return self.model[k]
-
-            elif sub and k in sub:
-                return sub[k]
-
-            else:
-                return k
-
         if type(value) in (list, tuple):
             new = []
             for item in value:
@@ -141,7 +164,20 @@ class Context:
             return value
 
         else:
-            return get(value)
+            return self.get_key(value, sub)
+
+    def get_key(self, k, sub=None):
+        if type(k) in CONSTANT_TYPES:
+            return k
+
+        elif k in self.model:
+            return self.model[k]
+
+        elif sub and k in sub:
+            return sub[k]
+
+        else:
+            return k
 
     def load_resource(self, file_name):
         """
@@ -151,7 +187,7 @@ class Context:
         """
         return self.resource_loader.load_resource(file_name)
 
-    def load_environment(self, data):
+    def load_environment(self, data, values=None):
         """
         This method should be called anytime a new top level Environment needs to
         be established, creating a hierarchy of Entity objects and using the
@@ -161,19 +197,111 @@ class Context:
         The 'model' dict is reset each time this method is called, so collisions
         between key names for data of each environment can be ignored.
 
+        Every resource loaded or requested while the environment is populated
+        is pinned in the ResourceLoader's cache, and the resources pinned by
+        the previous environment are released.
+
         :param data: dict or str, data to be passed to the
-            EnvironmentLoader's 'populate' method. If a 'str' is
-            passed, it's treated as a file_name passed to 'load_resource'
-            method
+            EnvironmentLoader's 'populate' method, or a compiled environment.
+            If a 'str' is passed, it's treated as a file_name passed to
+            'load_resource' method
+        :param values: None or dict, optional key/values added to the
+            'model' dict after it is reset, before the data is populated
         """
-        if type(data) is str:
-            data = self.load_resource(data)
+        # pin every resource used by the new environment in the cache
+        cache = self.resource_loader.cache
+        cache.unpin_all()
+        cache.pinning = True
 
-        self.reset_model()
-        self.populate(data)
+        try:
+            if type(data) is str:
+                data = self.load_resource(data)
+
+            self.reset_model()
+            if values:
+                self.model.update(values)
+
+            self.populate(data)
+
+        finally:
+            cache.pinning = False
 
         self.game.set_environment(self.model[con.ENVIRONMENT])
 
+    def compile_environment(self, data, values=None):
+        """
+        Loads an environment with 'load_environment' while recording every
+        entity, model value, Group, setter call and interface call made by
+        the EnvironmentLoader, and returns the record as a compiled
+        environment.
+
+        A compiled environment is a JSON serializable dict that can be
+        passed to 'load_environment' in place of the original data (or
+        saved to a file and loaded by name). It's replayed directly, so the
+        entity data files aren't loaded again and setter and interface
+        methods aren't looked up by name. Keys that referenced objects in
+        the 'model' dict are stored as references and resolved again on
+        each load, so every load still creates new Entity objects.
+
+        The same 'values' should be passed when the compiled environment
+        is loaded.
+
+        :param data: dict or str, see 'load_environment'
+        :param values: None or dict, see 'load_environment'
+
+        :return: dict, compiled environment
+        """
+        recording = []
+        self.env_loader.recording = recording
+
+        try:
+            self.load_environment(data, values=values)
+
+        finally:
+            self.env_loader.recording = None
+
+        return {con.COMPILED_ENVIRONMENT: recording}
+
+    def preload_environment(self, data, workers=None):
+        """
+        Starts loading every resource file referenced by an environment's
+        data on a pool of worker threads. See ResourceLoader.preload()
+
+        :param data: dict or str, environment data or its file name
+        :param workers: None or int, the number of worker threads
+
+        :return: ResourceLoadJob object
+        """
+        return self.resource_loader.preload(data, workers=workers)
+
+    def load_environment_async(self, data, loading_data, workers=None):
+        """
+        Loads a 'loading screen' environment immediately and starts loading
+        the resources of a second environment in the background. The
+        ResourceLoadJob is added to the loading environment's 'model' dict
+        under the 'load_job' key so that its entities can display progress.
+
+        The job is updated once per frame by the loading Environment object,
+        and once every resource has been handed over the second environment
+        is loaded with 'load_environment'.
+
+        :param data: dict or str, the environment to be loaded
+        :param loading_data: dict or str, the loading screen environment
+        :param workers: None or int, the number of worker threads
+
+        :return: ResourceLoadJob object
+        """
+        job = self.preload_environment(data, workers=workers)
+        self.load_environment(loading_data, values={con.LOAD_JOB: job})
+
+        def update_job():
+            if job.update():
+                self.load_environment(data)
+
+        self.model[con.ENVIRONMENT].update_methods.append(update_job)
+
+        return job
+
     @classmethod
     def get_default_context(cls, game, classes, interfaces=None):
         """
@@ -230,6 +358,12 @@ class EnvironmentLoader:
         self.get_value = context.get_value
         self.load_resource = context.load_resource
 
+        self.recording = None
+
+        # resource preloading before population
+        self.preload = True
+        self.workers = None
+
     @property
     def interfaces(self):
         """
@@ -249,6 +383,32 @@ class EnvironmentLoader:
         """
         return self.context.model
 
+    def load_resources(self, data):
+        """
+        Loads every resource file referenced by the data, including the
+        files referenced by any JSON data it references, on a pool of worker
+        threads and waits for them to finish. The entities are then created
+        and set up on the main thread against the warm ResourceCache.
+
+        The 'workers' attribute sets the number of worker threads. If it's
+        None, the ThreadPoolExecutor default (based on the number of CPUs)
+        is used. Setting the 'preload' flag to False disables this step.
+
+        Files that fail to load are skipped here, so that the error is
+        raised when the file is requested during population.
+
+        :param data: dict, entity/setter data or a compiled environment
+
+        :return: None or ResourceLoadJob object
+        """
+        if not self.preload:
+            return None
+
+        job = self.context.resource_loader.preload(data, workers=self.workers)
+        job.wait()
+
+        return job
+
     def set_layer_order(self, layer_entries):
         """
         This method sets a hierarchy of Layer.parent_layer attributes
@@ -265,6 +425,10 @@ class EnvironmentLoader:
             layer = self.model[l[con.NAME]]
 
             if layer is not env and layer.parent_layer is None:
+                self.record_value(
+                    [con.ENVIRONMENT], CALL_SETTER,
+                    layer.name, layer.set_parent_layer.__name__
+                )
                 layer.set_parent_layer(env)
 
     def add_entity(self, name, cls_name):
@@ -281,6 +445,7 @@ class EnvironmentLoader:
         cls = self.model[cls_name]
 
         if isclass(cls):
+            self.record(ADD_ENTITY, name, cls_name)
             entity = cls(name)
             self.model[name] = entity
 
@@ -383,8 +548,10 @@ class EnvironmentLoader:
         if (con.GROUP in set_attr) or (con.GROUPS in set_attr):
             for g in args:
                 if (type(g) is str) and g not in self.model:
+                    self.record(ADD_GROUP, g)
                     self.model[g] = Group(g)
 
+        self.record_value(args, CALL_SETTER, entity.name, set_attr)
         args = self.get_value(args, sub=sub)
 
         getattr(entity, set_attr)(*args)
@@ -461,6 +628,9 @@ class EnvironmentLoader:
         # Get list of data entries for Sprite objects
         sprites = get_entity_data(data, con.SPRITES)
 
+        # Get list of data entries for SpritePool objects
+        pools = get_entity_data(data, con.POOLS)
+
         # Make an "entities" list of layer and sprite data entries
         entities = layers + sprites
 
@@ -469,6 +639,26 @@ class EnvironmentLoader:
         # structure layer hierarchy
         self.set_layer_order(layers)
 
+        for p in pools:
+            self.add_pool(p)
+
+    def add_pool(self, entry):
+        """
+        Creates a SpritePool from a sprite data entry and adds it to the
+        Context object's model dict under the entry's name. The entry's
+        'pool_size' key sets the number of sprites instantiated up front.
+
+        :param entry: dict, sprite data entry
+        :return: SpritePool object
+        """
+        self.record(ADD_POOL, self.get_template(entry))
+
+        pool = SpritePool(self, entry)
+        pool.fill(entry.get(con.POOL_SIZE, 0))
+        self.model[pool.name] = pool
+
+        return pool
+
     def create_entities(self, entries, data=None):
         """
         For each 'entry' in the data dict passed to the 'populate'
@@ -561,6 +751,274 @@ class EnvironmentLoader:
 
             i.apply_to_entity(entity, i_data)
 
+    def record(self, *operation):
+        """
+        Adds an operation to the 'recording' list while an environment
+        is being compiled. See Context.compile_environment()
+
+        :param operation: str, the operation name, followed by its arguments
+        """
+        if self.recording is not None:
+            self.recording.append(list(operation))
+
+    def record_value(self, value, *operation):
+        """
+        Records an operation that takes a value passed to Context.get_value().
+        The value is stored as a template, followed by the list of paths to
+        each item in it that is a key in the 'model' dict. This should be
+        called just before the value is passed to get_value().
+
+        :param value: obj, the value before model keys are substituted
+        :param operation: str, the operation name, followed by its arguments
+        """
+        if self.recording is not None:
+            self.record(
+                *operation, self.get_template(value),
+                self.get_references(value)
+            )
+
+    def get_references(self, value, path=()):
+        """
+        Returns the paths of every item in 'value' that would be replaced by
+        Context.get_value(). Each path is a list of list indices and dict keys.
+
+        :param value: obj
+        :param path: tuple, the path of 'value'
+
+        :return: list, [[int or str, ...], ...]
+        """
+        if type(value) in (list, tuple):
+            items = enumerate(value)
+
+        elif type(value) is dict:
+            items = value.items()
+
+        else:
+            if type(value) not in CONSTANT_TYPES and value in self.model:
+                return [list(path)]
+
+            return []
+
+        references = []
+        for key, item in items:
+            references += self.get_references(item, path + (key,))
+
+        return references
+
+    @staticmethod
+    def get_template(value):
+        """
+        Returns a JSON serializable copy of a value recorded for a
+        compiled environment.
+
+        :param value: obj
+
+        :return: obj
+        """
+        if type(value) in (list, tuple):
+            return [EnvironmentLoader.get_template(v) for v in value]
+
+        elif type(value) is dict:
+            template = {}
+
+            for key in value:
+                if type(key) is not str:
+                    raise ValueError("Key {} can't be compiled".format(repr(key)))
+
+                template[key] = EnvironmentLoader.get_template(value[key])
+
+            return template
+
+        elif value is None or type(value) in (str, int, float, bool):
+            return value
+
+        else:
+            raise ValueError("Value {} can't be compiled".format(repr(value)))
+
+    def resolve(self, template, references):
+        """
+        Replaces the items of a template recorded by 'record_value' with
+        the objects in the 'model' dict they reference.
+
+        :param template: obj
+        :param references: list, paths returned by 'get_references'
+
+        :return: obj
+        """
+        model = self.model
+
+        for path in references:
+            if not path:
+                return model[template]
+
+            container = template
+            for key in path[:-1]:
+                container = container[key]
+
+            key = path[-1]
+            container[key] = model[container[key]]
+
+        return template
+
+    def replay(self, operations):
+        """
+        Replays the operations of a compiled environment in order, creating
+        each Entity, Group and model value and calling each setter and
+        interface method with the recorded arguments, in place of the
+        'populate' method. See Context.compile_environment()
+
+        :param operations: list, the recorded operations
+        """
+        # templates are resolved in place, so a copy is used
+        operations = pickle.loads(
+            pickle.dumps(operations, pickle.HIGHEST_PROTOCOL)
+        )
+        model = self.model
+        interfaces = {i.name: i for i in self.interfaces}
+
+        for operation in operations:
+            op = operation[0]
+
+            if op == ADD_ENTITY:
+                self.add_entity(*operation[1:])
+
+            elif op == ADD_GROUP:
+                name = operation[1]
+                model[name] = Group(name)
+
+            elif op == SET_VALUE:
+                name, template, references = operation[1:]
+                model[name] = self.resolve(template, references)
+
+            elif op == CALL_SETTER:
+                name, set_attr, template, references = operation[1:]
+                args = self.resolve(template, references)
+                getattr(model[name], set_attr)(*args)
+
+            elif op == CALL_INTERFACE:
+                i_name, name, method_name, template, references = operation[1:]
+                i = interfaces[i_name]
+                value = self.resolve(template, references)
+
+                getattr(i, method_name)(model[name], *i.get_args(value))
+
+            elif op == ADD_POOL:
+                self.add_pool(operation[1])
+
+            else:
+                raise ValueError("Unknown operation '{}' in compiled environment".format(op))
+
+
+class SpritePool:
+    """
+    A SpritePool pre-instantiates sprites from a sprite data entry, as
+    used in the 'sprites' list of the environment data, so that sprites
+    that are created and destroyed constantly don't each run the Entity
+    initialization, setter methods and interface methods.
+
+    Sprites are taken from the pool with 'get()', which moves them back to
+    the position set by the entry, resets them and adds them to the group
+    set by the entry. When a pooled sprite dies and is removed by its Layer
+    it's returned to the pool rather than being discarded. New sprites are
+    created whenever the pool is empty.
+
+    The entry's 'name' is used as the pool's name and as a prefix for the
+    names of its sprites.
+    """
+    def __init__(self, env_loader, entry):
+        """
+        :param env_loader: EnvironmentLoader object
+        :param entry: dict, sprite data entry
+        """
+        self.env_loader = env_loader
+        self.name = entry[con.NAME]
+        self.entry = entry
+
+        self.group = None
+        self.free = {}
+        self.positions = {}
+        self.created = 0
+
+    def __repr__(self):
+        return "SpritePool: {} ({} free)".format(self.name, len(self.free))
+
+    def fill(self, n):
+        """
+        Instantiates 'n' sprites and adds them to the pool
+
+        :param n: int
+        """
+        for i in range(n):
+            self.release(self.create())
+
+    def create(self):
+        """
+        Creates a new sprite from the pool's entry. The EnvironmentLoader
+        doesn't record the setter and interface calls, as replaying the
+        pool's ADD_POOL operation creates its sprites again.
+
+        :return: Sprite object
+        """
+        loader = self.env_loader
+
+        # the entry dict is updated by 'set_entity_attributes'
+        entry = pickle.loads(pickle.dumps(self.entry, pickle.HIGHEST_PROTOCOL))
+        entry[con.NAME] = "{}_{}".format(self.name, self.created)
+        self.created += 1
+
+        recording, loader.recording = loader.recording, None
+
+        try:
+            sprite = loader.add_entity(entry[con.NAME], entry[con.CLASS])
+            loader.set_entity_attributes(sprite, entry, init=True)
+            loader.apply_interfaces(sprite, entry)
+
+        finally:
+            loader.recording = recording
+
+        sprite.pool = self
+        self.positions[sprite] = sprite.position
+
+        # the sprite is only added to its group when taken from the pool
+        if sprite.group is not None:
+            self.group = sprite.group
+            self.group.remove_member(sprite)
+            sprite.group = None
+
+        return sprite
+
+    def get(self):
+        """
+        Returns a reset sprite from the pool, creating a new one if the pool
+        is empty, and adds it to the pool's group.
+
+        :return: Sprite object
+        """
+        if self.free:
+            sprite = self.free.popitem()[0]
+
+        else:
+            sprite = self.create()
+
+        # the position is restored first so that the sprite's physics is
+        # reset at its initial position
+        sprite.set_position(*self.positions[sprite])
+        sprite.reset()
+
+        if self.group is not None:
+            sprite.set_group(self.group)
+
+        return sprite
+
+    def release(self, sprite):
+        """
+        Returns a sprite created by this pool to it
+
+        :param sprite: Sprite object
+        """
+        if sprite.pool is self:
+            self.free[sprite] = None
+
 
 class ApplicationInterface:
     """
@@ -607,21 +1065,34 @@ class ApplicationInterface:
         get_order = self.context.env_loader.get_init_order
 
         for method_name in get_order(entry, self.init_order):
-            value = self.get_value(entry[method_name])
-
-            if value is True:
-                value = []
-
-            if type(value) is not list:
-                args = [value]
-            else:
-                args = value
-
             m = getattr(self, method_name, None)
 
             if m:
-                m(entity, *args)
+                self.context.env_loader.record_value(
+                    entry[method_name], CALL_INTERFACE,
+                    self.name, entity.name, method_name
+                )
+                value = self.get_value(entry[method_name])
+                m(entity, *self.get_args(value))
             else:
                 raise ValueError("Interface method {} not found in class {}".format(
                     method_name, self.name
                 ))
+
+    @staticmethod
+    def get_args(value):
+        """
+        Returns the list of arguments passed to an interface method for
+        a value in an 'entry' dict.
+
+        :param value: obj, the value after model keys are substituted
+
+        :return: list
+        """
+        if value is True:
+            value = []
+
+        if type(value) is not list:
+            return [value]
+
+        return value
@@ -1,13 +1,63 @@
+from itertools import count
 import zsquirrel.constants as con
 from zsquirrel.events import EventHandlerObj
 from zsquirrel.utils.geometry import add_points
 
 
+class TrackedField:
+    """
+    TrackedField descriptors are installed by the EntityMetaclass for each
+    attribute name in an Entity subclass's 'tracked_fields'. The value is
+    stored in the instance's __dict__ as a plain attribute would be, but
+    once the 'initialized' flag is True each assignment is also passed to
+    the entity's 'log_data()' method.
+    """
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+
+        try:
+            return instance.__dict__[self.name]
+
+        except KeyError:
+            raise AttributeError(self.name)
+
+    def __set__(self, instance, value):
+        d = instance.__dict__
+        d[self.name] = value
+
+        if d.get("initialized"):
+            if not (self.name == con.PARENT_LAYER and value == con.ENVIRONMENT):
+                instance.log_data(self.name, value)
+
+
 class EntityMetaclass(type):
     """
     The EntityMetaclass ensures that the 'initialized' flag is set to True on
     any Entity subclass instance after it's __init__ method has been executed.
+
+    It also installs a TrackedField descriptor for each name listed in a
+    class's 'tracked_fields' when the class is created, so that the set of
+    logged attributes is resolved once per class rather than on every
+    attribute assignment.
     """
+    def __init__(cls, name, bases, namespace):
+        super(EntityMetaclass, cls).__init__(name, bases, namespace)
+
+        for field in getattr(cls, "tracked_fields", ()):
+            current = getattr(cls, field, None)
+
+            if current is None:
+                setattr(cls, field, TrackedField(field))
+
+            elif not isinstance(current, TrackedField):
+                raise TypeError("{} can't track '{}', it's already defined by the class".format(
+                    name, field
+                ))
+
     def __call__(cls, *args, **kwargs):
         new = type.__call__(cls, *args, **kwargs)
         new.initialized = True
@@ -16,14 +66,18 @@ class EntityMetaclass(type):
 
 
 class Entity(EventHandlerObj, metaclass=EntityMetaclass):
+    # attribute names whose changes are logged in 'zs_data', see TrackedField
+    tracked_fields = ()
+
     def __init__(self, name):
         """
         The __init__ method for the Entity class ensures all entities have
         a 'zs_data' attribute storing a dict that records hashable keys
-        and values for each setter method called during the Context class's
-        populate() method. These values will only be updated to the dict
-        after the __init__ method has executed and the 'initialized' flag
-        is set to True by the metaclass.
+        and values for each attribute listed in the class's 'tracked_fields'.
+        These values will only be updated to the dict after the __init__
+        method has executed and the 'initialized' flag is set to True by the
+        metaclass. Attributes that aren't tracked are stored without any
+        logging overhead.
 
         All entities take a name value and have a 'size' and 'position' attribute
         defined by default as the tuple (0, 0). A number of flags are also set:
@@ -69,6 +123,10 @@ class Entity(EventHandlerObj, metaclass=EntityMetaclass):
             self.event.clock.tick
         ]
 
+        # called by reset(), interfaces add methods for the state they set up
+        self.reset_methods = []
+        self.resets = 0
+
         self.event.queue(con.SPAWN)
 
     def __repr__(self):
@@ -77,24 +135,6 @@ class Entity(EventHandlerObj, metaclass=EntityMetaclass):
 
         return "<{}: {}>".format(c, n)
 
-    def __setattr__(self, key, value):
-        """
-        This method ensures that, once the 'initialized' flag has been set to
-        True, any attribute (such as 'size' or 'position') with a setter method
-        has it's value changes logged in the 'zs_data' dict. I.E. values set
-        during the __init__ method will not be recorded, but any changes made
-        in the Context.populate() or changes made at runtime by update methods
-        and event handling will be stored in the 'zs_data' dict.
-
-        :param key: str
-        :param value: hashable obj or Entity or Group
-        """
-        super(Entity, self).__setattr__(key, value)
-
-        if hasattr(self, "set_" + key) and self.initialized:
-            if not (key == con.PARENT_LAYER and value == con.ENVIRONMENT):
-                self.log_data(key, value)
-
     def log_data(self, key, value):
         """
         This method helps ensure that any value passed to each setter
@@ -124,8 +164,8 @@ class Entity(EventHandlerObj, metaclass=EntityMetaclass):
     def add_to_list(self, list_name, *items):
         """
         This method should be used by setter methods that append items
-        to a list attribute to ensure that the __setattr_ method is
-        called and any changes are logged.
+        to a list attribute to ensure that the list is reassigned and
+        any changes are logged if it's a tracked field.
 
         :param list_name: str
         :param items: (obj, ...)
@@ -221,6 +261,43 @@ class Entity(EventHandlerObj, metaclass=EntityMetaclass):
         else:
             return []
 
+    def reset(self):
+        """
+        Returns an entity to the state it was in after initialization so that
+        it can be reused, e.g. by a SpritePool. The flags are restored to their
+        defaults, temporary event timers are removed and the 'spawn' event is
+        queued again. A 'physics' attribute is reset and each method in
+        'reset_methods' is called, so that interfaces can reset the state
+        they set up, such as animation meters. Timers that aren't temporary,
+        graphics and any other attributes set up by setters and interfaces
+        are kept.
+
+        The 'resets' counter is incremented, which lets objects that cache
+        state about an entity, such as a ContactCache, tell that it has
+        been reused.
+
+        Subclasses with additional runtime state should extend this method.
+        """
+        self.spawned = False
+        self.dead = False
+        self.paused = False
+        self.visible = True
+        self.resets += 1
+
+        clock = self.event.clock
+        clock.timers = [t for t in clock.timers if not t.temp]
+        clock.to_add = [t for t in clock.to_add if not t.temp]
+        clock.to_remove = []
+
+        physics = getattr(self, "physics", None)
+        if physics is not None:
+            physics.reset()
+
+        for m in self.reset_methods:
+            m()
+
+        self.event.queue(con.SPAWN)
+
     def on_spawn(self):
         """
         Event method for 'spawn' event, which is queued by default whenever
@@ -259,6 +336,11 @@ class Layer(Entity):
         self.groups = []
         self.controllers = []
 
+        # the list returned by get_sprites() and the 'version' of each
+        # group it was built from
+        self.sprite_cache = []
+        self.sprite_cache_versions = []
+
         self.update_methods += [
             self.update_sprites,
             self.update_sub_layers,
@@ -328,7 +410,30 @@ class Layer(Entity):
         return args
 
     def get_sprites(self):
-        return self.get_sprites_from_groups(*self.groups)
+        """
+        Returns a list of all sprites in the Layer's groups. The list is cached
+        and only rebuilt when the membership of a group changes, so it should
+        not be modified by the caller.
+
+        :return: list
+        """
+        groups = self.groups
+        versions = self.sprite_cache_versions
+        changed = len(versions) != len(groups)
+
+        if not changed:
+            i = 0
+            for g in groups:
+                if g.version != versions[i]:
+                    changed = True
+                    break
+                i += 1
+
+        if changed:
+            self.sprite_cache = self.get_sprites_from_groups(*groups)
+            self.sprite_cache_versions = [g.version for g in groups]
+
+        return self.sprite_cache
 
     @staticmethod
     def get_sprites_from_groups(*groups):
@@ -350,7 +455,7 @@ class Layer(Entity):
     def remove_sprite(sprite):
         """
         Removes a sprite from its current group and sets the 'group' attribute
-        to None
+        to None. Sprites created by a SpritePool are then returned to it.
 
         :param sprite: Sprite object
         """
@@ -358,20 +463,30 @@ class Layer(Entity):
         sprite.group = None
         g.remove_member(sprite)
 
+        if sprite.pool is not None:
+            sprite.pool.release(sprite)
+
     def update_sprites(self):
         """
         Calls the 'update()' method for each Sprite returned by 'get_sprites()' if
         its 'pause' flag is not set to True.
 
         Calls 'remove_sprite()' on any sprite with the 'dead' flag set to True
+        after every other sprite has been updated, so that the sprite list
+        is only rebuilt once per frame however many sprites are removed.
         """
+        dead = []
+
         for s in self.get_sprites():
             if s.dead:
-                self.remove_sprite(s)
+                dead.append(s)
 
             elif not s.paused:
                 s.update()
 
+        for s in dead:
+            self.remove_sprite(s)
+
     def update_sub_layers(self):
         """
         Calls the 'update()' method for each layer in 'sub_layers' list
@@ -428,12 +543,15 @@ class Sprite(Entity):
         it also has a 'controller' attribute which references the Controller
         whose input will be used for any relevant update methods of this Sprite.
 
+        Sprites created by a SpritePool reference it with their 'pool' attribute.
+
         :param name: str
         """
         super(Sprite, self).__init__(name)
 
         self.group = None
         self._controller = None
+        self.pool = None
 
     @property
     def controller(self):
@@ -476,56 +594,99 @@ class Group:
 
     Groups have a name and can be added to a Layer object's 'groups'
     list to ensure that its Sprites are updated each frame.
+
+    Members are stored as the keys of an insertion ordered dict, so that
+    adding, removing and checking for a member take constant time.
+    The 'sprites' list used for iteration and indexing is built from the
+    dict when it's first accessed after a change.
+
+    Each change in membership sets the Group's 'version' to a new value
+    from a counter shared by all groups, so no two groups ever have the
+    same version and a Layer can tell whether its groups have changed by
+    comparing their versions to those its sprite list was built from.
     """
+    versions = count(1)
+
     def __init__(self, name):
         """
-        Defines the Group name and creates a 'sprites' list for that group
+        Defines the Group name and creates a 'members' dict for that group
 
         :param name: str
         """
         self.name = name
-        self.sprites = []
+        self.members = {}
+        self._sprites = []
+        self.version = next(Group.versions)
 
     def __repr__(self):
         n = self.name
-        m = len(self.sprites)
+        m = len(self.members)
 
         return "Group: {} ({} members)".format(n, m)
 
+    @property
+    def sprites(self):
+        """
+        A list of the Group's members in the order they were added. The list
+        is replaced rather than modified when the membership changes, so it
+        is safe to iterate over while adding or removing members.
+
+        :return: list
+        """
+        if self._sprites is None:
+            self._sprites = list(self.members)
+
+        return self._sprites
+
+    def update_version(self):
+        self.version = next(Group.versions)
+        self._sprites = None
+
+    def set_members(self, members):
+        self.members = dict.fromkeys(members)
+        self.update_version()
+
     def empty(self):
-        self.sprites = []
+        self.members = {}
+        self.update_version()
 
     def add_member(self, member):
-        if member not in self.sprites:
-            self.sprites.append(member)
+        if member not in self.members:
+            self.members[member] = None
+            self.update_version()
 
     def remove_member(self, member):
-        for s in self.sprites:
-            if member is s:
-                self.sprites.pop(
-                    self.sprites.index(member)
-                )
+        if member in self.members:
+            del self.members[member]
+            self.update_version()
 
     def __getitem__(self, key):
         return self.sprites.__getitem__(key)
 
     def __len__(self):
-        return len(self.sprites)
+        return len(self.members)
 
     def __setitem__(self, key, value):
-        return self.sprites.__setitem__(key, value)
+        sprites = list(self.sprites)
+        sprites[key] = value
+        self.set_members(sprites)
 
     def __delitem__(self, key):
-        return self.sprites.__delitem__(key)
+        sprites = list(self.sprites)
+        del sprites[key]
+        self.set_members(sprites)
 
     def __iter__(self):
         return self.sprites.__iter__()
 
     def __iadd__(self, other):
-        return self.sprites.__iadd__(other)
+        for member in other:
+            self.add_member(member)
+
+        return self
 
     def __add__(self, other):
         return self.sprites.__add__(other)
 
     def __contains__(self, item):
-        return self.sprites.__contains__(item)
+        return item in self.members
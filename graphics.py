@@ -1,4 +1,5 @@
 from zsquirrel.context import ApplicationInterface
+from zsquirrel.resources import Image
 from zsquirrel.utils.geometry import Rect, Vector, Wall, add_points
 import zsquirrel.constants as con
 
@@ -54,28 +55,39 @@ class ImageSectionGraphics(ImageGraphics):
 
             return args
 
-    # section = (rect, draw_offset, mirror=(False, False))
+    # section = (rect, draw_offset, mirror=(False, False), rotate=0.0)
     # rect = Rect(size, position)   object
     # draw_offset = (ox, oy)        (int, int)
     # mirror = (x_bool, y_bool)     (bool, bool)
+    # rotate = clockwise rotations  float
     def get_section_args(self, section):
         rect, offset = section[0:2]
-        image = self.image.subsurface(rect)
 
         mirror = False, False
+        rotate = 0
 
         if len(section) > 2:
             mirror = section[2]
 
-        mirror_x, mirror_y = mirror
-        if mirror_x or mirror_y:
-            image = image.flip(mirror_x, mirror_y)
+        if len(section) > 3:
+            rotate = section[3]
+
+        image = Image.TRANSFORM_CACHE.get_image(
+            self.image, rect, mirror, rotate
+        )
 
         px, py = self.entity.position
         ox, oy = offset
         px += ox
         py += oy
 
+        # rotated sections are drawn around the center of the original section
+        if rotate:
+            w, h = rect.size
+            rw, rh = image.get_size()
+            px += (w - rw) / 2
+            py += (h - rh) / 2
+
         layer_args = (image, (px, py))
 
         return layer_args
@@ -1,4 +1,52 @@
-from zsquirrel.utils.geometry import Vector
+from concurrent.futures import ThreadPoolExecutor
+import zsquirrel.constants as con
+from zsquirrel.events import NAME
+from zsquirrel.utils.geometry import Vector, Wall
+
+DEFAULT_SLEEP_FRAMES = 30
+
+# pairs are split into this many chunks per worker thread
+CHUNKS_PER_WORKER = 4
+UNTESTED = object()
+
+# worker thread pools shared by every CollisionSystem, keyed by their size,
+# so that loading a new environment doesn't start new threads
+EXECUTORS = {}
+
+# CollisionWorld defaults
+DEFAULT_CELL_SIZE = 64
+ALL_CATEGORIES = ~0
+
+# cached contacts are reused while neither body moves further than this, in
+# pixels. Matches the bounds slack of Wall.vector_collision, and is larger
+# than the distance gravity moves a resting body into its support each frame
+DEFAULT_CONTACT_THRESHOLD = 1
+
+
+def get_executor(workers):
+    """
+    Returns the shared ThreadPoolExecutor with 'workers' threads, creating
+    it the first time it's requested.
+
+    :param workers: int
+
+    :return: ThreadPoolExecutor object
+    """
+    if workers not in EXECUTORS:
+        EXECUTORS[workers] = ThreadPoolExecutor(max_workers=workers)
+
+    return EXECUTORS[workers]
+
+
+def shutdown_executors():
+    """
+    Shuts down every shared worker thread pool. Pools are created again
+    by the next parallel CollisionSystem update.
+    """
+    for executor in EXECUTORS.values():
+        executor.shutdown()
+
+    EXECUTORS.clear()
 
 
 class Physics:
@@ -12,9 +60,15 @@ class Physics:
         self.friction = friction
 
         self.velocity = Vector(0, 0)
-        self.forces = []
+        self.force = Vector(0, 0)
         self.last_position = 0, 0
 
+        # rest detection, disabled while 'sleep_threshold' is None
+        self.sleep_threshold = None
+        self.sleep_frames = DEFAULT_SLEEP_FRAMES
+        self.rest_frames = 0
+        self.sleeping = False
+
     def get_instantaneous_velocity(self):
         entity = self.entity
         x, y = entity.position
@@ -37,35 +91,98 @@ class Physics:
     def set_friction(self, value):
         self.friction = value
 
+    def set_sleep_threshold(self, value, frames=DEFAULT_SLEEP_FRAMES):
+        """
+        Enables rest detection. A body whose speed and acceleration from
+        applied forces both stay below 'value' at the start of its update
+        for 'frames' consecutive updates is put to sleep: its velocity is
+        zeroed and its updates skip gravity, integration and movement, and
+        CollisionSystem objects skip its pairs with static items and other
+        sleeping bodies.
+
+        A sleeping body wakes when a non-zero force is applied, when a
+        CollisionSystem handles a collision involving it, or when wake()
+        is called. wake() should be called after setting the velocity or
+        removing a body's support directly.
+
+        :param value: None or int or float, None disables rest detection
+        :param frames: int
+        """
+        self.sleep_threshold = value
+        self.sleep_frames = frames
+
+        if value is None:
+            self.wake()
+
+    def sleep(self):
+        self.sleeping = True
+        self.velocity.set_value(0, 0)
+        self.force.set_value(0, 0)
+
+    def wake(self):
+        self.sleeping = False
+        self.rest_frames = 0
+
+    # called by Entity.reset() when a body is reused
+    def reset(self):
+        self.velocity.set_value(0, 0)
+        self.force.set_value(0, 0)
+        self.last_position = self.entity.position
+        self.wake()
+
+    def check_rest(self):
+        # squared speed and acceleration are compared to the squared threshold
+        t = self.sleep_threshold
+        t *= t
+        v, f = self.velocity, self.force
+
+        speed = (v.i_hat * v.i_hat) + (v.j_hat * v.j_hat)
+        acceleration = ((f.i_hat * f.i_hat) + (f.j_hat * f.j_hat)) / (self.mass * self.mass)
+
+        if speed < t and acceleration < t:
+            self.rest_frames += 1
+
+            if self.rest_frames >= self.sleep_frames:
+                self.sleep()
+
+        else:
+            self.rest_frames = 0
+
+        return self.sleeping
+
     def scale_movement_in_direction(self, angle, value):
         self.velocity.scale_in_direction(angle, value)
 
-    def apply_force(self, i, j):
-        self.forces.append(
-            Vector(i, j)
-        )
+    def scale_movement_along_axis(self, ui, uj, value):
+        self.velocity.scale_along_axis(ui, uj, value)
 
-    def integrate_forces(self):
-        forces = self.forces
-        self.forces = []
+    # forces are summed as they're applied and integrated once per update
+    def apply_force(self, i, j):
+        if self.sleeping and (i or j):
+            self.wake()
 
-        i, j = 0, 0
+        self.force.add_xy(i, j)
 
-        for f in forces:
-            i += f.i_hat
-            j += f.j_hat
+    def integrate_forces(self):
+        force = self.force
+        m = 1 / self.mass
 
-        acceleration = Vector(i, j).scale(1 / self.mass)
-        self.velocity.add_vector(acceleration)
+        self.velocity.add_xy(force.i_hat * m, force.j_hat * m)
+        force.set_value(0, 0)
 
     def apply_velocity(self):
-        self.entity.move(
-            *self.velocity.get_value()
-        )
+        velocity = self.velocity
+        self.entity.move(velocity.i_hat, velocity.j_hat)
 
     def update(self):
         self.last_position = self.entity.position
 
+        if self.sleeping:
+            return
+
+        if self.sleep_threshold is not None and self.check_rest():
+            return
+
         # gravity
         if self.gravity:
             g = self.gravity * self.mass
@@ -80,19 +197,134 @@ class Physics:
 
 
 class CollisionSystem:
-    def __init__(self, a, b, test, handle):
+    def __init__(self, a, b, test, handle, workers=0):
+        """
+        :param a: Group or list
+        :param b: None or Group or list, if None the pairs are
+            formed within group 'a'
+        :param test: method, takes a pair and returns a collision or None
+        :param handle: method, takes a pair and its collision
+        :param workers: int, if greater than 0 the pairs are tested on a
+            shared pool of this many worker threads, see update_parallel()
+        """
         self.group_a = a
         self.group_b = b
 
         self.test_method = test
         self.handle_method = handle
 
+        self.workers = workers
+
+        # optional ContactCache
+        self.contacts = None
+
     def update(self):
-        for (a, b) in self.get_pairs():
-            collision = self.test_method(a, b)
+        if self.workers:
+            self.update_parallel()
+
+        else:
+            is_active = self.is_active_pair
+
+            for (a, b) in self.get_pairs():
+                if not is_active(a, b):
+                    continue
+
+                collision = self.test_pair(a, b)
+
+                if collision:
+                    self.handle_collision(a, b, collision)
+
+        if self.contacts is not None:
+            self.contacts.update()
+
+    def test_pair(self, a, b):
+        if self.contacts is not None:
+            return self.contacts.test(a, b, self.test_method)
+
+        return self.test_method(a, b)
+
+    def handle_collision(self, a, b, collision):
+        self.wake_item(a)
+        self.wake_item(b)
+        self.handle_method(a, b, collision)
+
+        if self.contacts is not None:
+            self.contacts.add(a, b, collision)
+
+    def update_parallel(self):
+        """
+        Tests every active pair on a pool of worker threads, then handles the
+        collisions serially in pair order.
+
+        Handle methods typically move the items of their pair, so any pair
+        with an item that was part of an earlier handled collision is tested
+        again before it's handled. As long as tests only depend on the state
+        of their own pair, the results are the same as the serial update().
+
+        This only speeds up test methods that release the GIL, such as tests
+        built on NumPy. The pure Python tests of PhysicsInterface run slower
+        this way, which is why it's opt in.
+        """
+        test, is_active = self.test_method, self.is_active_pair
+        pairs = self.get_pairs()
+        results = [UNTESTED] * len(pairs)
+
+        indices = [i for i, (a, b) in enumerate(pairs) if is_active(a, b)]
+
+        if indices:
+            executor = get_executor(self.workers)
+
+            n = self.workers * CHUNKS_PER_WORKER
+            size = -(-len(indices) // n)
+            chunks = [indices[i:i + size] for i in range(0, len(indices), size)]
+
+            def run_tests(chunk):
+                return [test(*pairs[i]) for i in chunk]
+
+            for chunk, collisions in zip(chunks, executor.map(run_tests, chunks)):
+                for i, collision in zip(chunk, collisions):
+                    results[i] = collision
+
+        handled = set()
+
+        for i, (a, b) in enumerate(pairs):
+            if not is_active(a, b):
+                continue
+
+            collision = results[i]
+            if collision is UNTESTED or id(a) in handled or id(b) in handled:
+                collision = test(a, b)
 
             if collision:
-                self.handle_method(a, b, collision)
+                handled.add(id(a))
+                handled.add(id(b))
+
+                self.handle_collision(a, b, collision)
+
+    # Returns True for sleeping bodies, False for awake ones, and None for
+    # items without a Physics object, such as Walls
+    @staticmethod
+    def is_sleeping(item):
+        physics = getattr(item, "physics", None)
+
+        if physics is None:
+            return None
+
+        return physics.sleeping
+
+    # pairs with a sleeping body are skipped unless the other item is awake
+    @staticmethod
+    def is_active_pair(a, b):
+        sa, sb = CollisionSystem.is_sleeping(a), CollisionSystem.is_sleeping(b)
+
+        return not (sa or sb) or sa is False or sb is False
+
+    @staticmethod
+    def wake_item(item):
+        physics = getattr(item, "physics", None)
+
+        if physics is not None and physics.sleeping:
+            physics.wake()
 
     def get_pairs(self):
         a, b = self.group_a, self.group_b
@@ -125,3 +357,455 @@ class CollisionSystem:
                 pairs.append((item, other))
 
         return pairs
+
+
+class BatchCollisionSystem(CollisionSystem):
+    # The test method is called once per update with both groups and returns
+    # a list of (a, b, collision) tuples, so that every pair can be tested in
+    # a single batched computation. With more than one iteration, the groups
+    # are tested again after the collisions are handled until there are none
+    # left, e.g. for sprites that slide from one wall into another
+    def __init__(self, a, b, test, handle, iterations=1):
+        super(BatchCollisionSystem, self).__init__(a, b, test, handle)
+
+        self.iterations = iterations
+
+    def update(self):
+        a, b = self.group_a, self.group_b
+
+        if b is None:
+            b = a
+
+        for i in range(self.iterations):
+            collisions = self.test_method(a, b)
+
+            if not collisions:
+                break
+
+            for (item, other, collision) in collisions:
+                self.handle_collision(item, other, collision)
+
+        if self.contacts is not None:
+            self.contacts.update()
+
+
+class CollisionWorld:
+    def __init__(self, cell_size=DEFAULT_CELL_SIZE):
+        """
+        A CollisionWorld replaces a set of CollisionSystem objects with a
+        single broad phase over every registered body.
+
+        Each body has a 'category' and a 'mask' bitmask, taken from the
+        group it was added with or from its own 'collision_filter' attribute,
+        a (category, mask) tuple. Two bodies are only tested if each one's
+        category is in the other's mask.
+
+        Each frame the bounds of every body are hashed into a uniform grid
+        of 'cell_size' cells, and only bodies sharing a cell are paired. Each
+        candidate pair is then passed to the test and handle methods of the
+        first rule whose categories match the pair, in either order.
+
+        :param cell_size: int or float
+        """
+        self.cell_size = cell_size
+
+        self.groups = []
+        self.rules = []
+        self.dispatch = {}
+
+        # optional ContactCache
+        self.contacts = None
+
+    def add_group(self, group, category, mask=ALL_CATEGORIES):
+        """
+        :param group: Group object or iterable
+        :param category: int, bitmask
+        :param mask: int, bitmask of the categories this group collides with
+        """
+        self.groups.append((group, category, mask))
+
+    def add_rule(self, category_a, category_b, test, handle):
+        """
+        Adds a pair of test and handle methods for bodies in 'category_a'
+        colliding with bodies in 'category_b'. The methods are always passed
+        the body from 'category_a' first.
+
+        :param category_a: int, bitmask
+        :param category_b: int, bitmask
+        :param test: function, test(a, b) returns a collision or None
+        :param handle: function, handle(a, b, collision)
+        """
+        self.rules.append((category_a, category_b, test, handle))
+        self.dispatch = {}
+
+    def get_rule(self, category_a, category_b):
+        # returns (test, handle, swapped) for a pair of categories, or None
+        key = category_a, category_b
+
+        if key not in self.dispatch:
+            rule = None
+
+            for (a, b, test, handle) in self.rules:
+                if category_a & a and category_b & b:
+                    rule = test, handle, False
+                    break
+
+                if category_b & a and category_a & b:
+                    rule = test, handle, True
+                    break
+
+            self.dispatch[key] = rule
+
+        return self.dispatch[key]
+
+    def get_bodies(self):
+        # returns [(item, category, mask), ...] with each item listed once
+        bodies = []
+        found = set()
+
+        for (group, category, mask) in self.groups:
+            for item in group:
+                if id(item) not in found:
+                    found.add(id(item))
+                    item_category, item_mask = getattr(
+                        item, "collision_filter", (category, mask)
+                    )
+                    bodies.append((item, item_category, item_mask))
+
+        return bodies
+
+    @staticmethod
+    def get_bounds(item):
+        """
+        Returns the bounding box of a Wall, or of an entity's rect covering
+        both its movement this frame, from its Physics object's
+        'last_position' to its current position, as swept tests check, and
+        its next movement along its velocity, as ray tests such as
+        PhysicsInterface.wall_velocity_test check.
+
+        :param item: Wall or Entity object
+
+        :return: (x0, y0, x1, y1)
+        """
+        if isinstance(item, Wall):
+            ox, oy = item.origin
+            fx, fy = ox + item.i_hat, oy + item.j_hat
+
+            # the 1 pixel slack of Wall.vector_collision
+            return min(ox, fx) - 1, min(oy, fy) - 1, max(ox, fx) + 1, max(oy, fy) + 1
+
+        x, y = item.position
+        w, h = item.size
+        x0, y0, x1, y1 = x, y, x, y
+
+        physics = getattr(item, "physics", None)
+        if physics is not None:
+            lx, ly = physics.last_position
+            v = physics.velocity
+            vx, vy = x + v.i_hat, y + v.j_hat
+
+            x0, x1 = min(x, lx, vx), max(x, lx, vx)
+            y0, y1 = min(y, ly, vy), max(y, ly, vy)
+
+        return x0, y0, x1 + w, y1 + h
+
+    def get_candidate_pairs(self, bodies):
+        """
+        Returns the (i, j) indices of every pair of bodies whose bounds
+        share a grid cell, with i < j, in the order they were registered.
+
+        :param bodies: list, [(item, category, mask), ...]
+
+        :return: list, [(int, int), ...]
+        """
+        s = self.cell_size
+        cells = {}
+
+        for index, (item, category, mask) in enumerate(bodies):
+            if not mask:
+                continue
+
+            x0, y0, x1, y1 = self.get_bounds(item)
+
+            for cx in range(int(x0 // s), int(x1 // s) + 1):
+                for cy in range(int(y0 // s), int(y1 // s) + 1):
+                    cell = cells.get((cx, cy))
+
+                    if cell is None:
+                        cells[(cx, cy)] = [index]
+
+                    else:
+                        cell.append(index)
+
+        pairs = set()
+        for cell in cells.values():
+            n = len(cell)
+
+            for i in range(n - 1):
+                a = cell[i]
+
+                for j in range(i + 1, n):
+                    pairs.add((a, cell[j]))
+
+        return sorted(pairs)
+
+    def update(self):
+        bodies = self.get_bodies()
+        get_rule, is_active = self.get_rule, CollisionSystem.is_active_pair
+        contacts = self.contacts
+
+        for (i, j) in self.get_candidate_pairs(bodies):
+            a, category_a, mask_a = bodies[i]
+            b, category_b, mask_b = bodies[j]
+
+            if not (category_a & mask_b and category_b & mask_a):
+                continue
+
+            rule = get_rule(category_a, category_b)
+            if rule is None:
+                continue
+
+            test, handle, swapped = rule
+            if swapped:
+                a, b = b, a
+
+            if is_active(a, b):
+                if contacts is not None:
+                    collision = contacts.test(a, b, test)
+                else:
+                    collision = test(a, b)
+
+                if collision:
+                    CollisionSystem.wake_item(a)
+                    CollisionSystem.wake_item(b)
+                    handle(a, b, collision)
+
+                    if contacts is not None:
+                        contacts.add(a, b, collision)
+
+        if contacts is not None:
+            contacts.update()
+
+
+class Contact:
+    __slots__ = "a", "b", "collision", "a_position", "b_position", "a_resets", "b_resets"
+
+    def __init__(self, a, b, collision):
+        self.a = a
+        self.b = b
+        self.collision = collision
+
+        self.a_position = getattr(a, "position", None)
+        self.b_position = getattr(b, "position", None)
+
+        # see Entity.reset()
+        self.a_resets = getattr(a, "resets", 0)
+        self.b_resets = getattr(b, "resets", 0)
+
+    def is_stale(self):
+        # True if either body has been reset, e.g. by a SpritePool, since
+        # the contact was found
+        return (getattr(self.a, "resets", 0) != self.a_resets or
+                getattr(self.b, "resets", 0) != self.b_resets)
+
+
+class ContactCache:
+    def __init__(self, threshold=DEFAULT_CONTACT_THRESHOLD):
+        """
+        A ContactCache keeps the last collision of every touching pair of a
+        CollisionSystem or CollisionWorld between frames.
+
+        While neither body of a cached pair has moved further than 'threshold'
+        since its collision was found, and the bodies aren't separating along
+        the contact normal, the cached collision is returned instead of
+        calling the test method again. This lets resting contacts, such as
+        sprites stacked on each other or on a wall, skip the narrow phase,
+        while bodies that start to move apart are tested again so that the
+        handle method doesn't hold them in place. A threshold of None
+        disables the reuse.
+
+        Entities with an 'event' attribute are sent a 'contact_begin' event on
+        the first frame of a contact, 'contact_persist' on each frame after
+        that and 'contact_end' on the first frame it's no longer handled. Each
+        event dict has an 'other' key for the other body and a 'contact' key
+        for the collision. Contacts between bodies that are both asleep or
+        static persist without events until either body dies or is removed
+        from its group. Contacts of a body that has been reset
+        since they were found, e.g. a sprite reused by a SpritePool, are
+        dropped without events, so the reused body starts with no contacts.
+
+        :param threshold: None or int or float, in pixels
+        """
+        self.threshold = threshold
+
+        self.contacts = {}
+        self.tested = {}
+        self.touched = set()
+
+    # the positions of a contact are recorded when the test method is called,
+    # before the collision is handled, so that a reused contact is only
+    # compared to the positions it was actually found at
+    def test(self, a, b, test):
+        key = id(a), id(b)
+        contact = self.get_contact(key)
+
+        if contact is not None and not (self.has_moved(contact) or self.is_separating(contact)):
+            return contact.collision
+
+        collision = test(a, b)
+        if collision:
+            self.tested[key] = Contact(a, b, collision)
+
+        return collision
+
+    def get_contact(self, key):
+        contact = self.contacts.get(key)
+
+        if contact is not None and contact.is_stale():
+            del self.contacts[key]
+            contact = None
+
+        return contact
+
+    def has_moved(self, contact):
+        t = self.threshold
+
+        if t is None:
+            return True
+
+        t *= t
+
+        for (item, last) in ((contact.a, contact.a_position), (contact.b, contact.b_position)):
+            if last is not None:
+                x, y = item.position
+                lx, ly = last
+                x -= lx
+                y -= ly
+
+                if (x * x) + (y * y) > t:
+                    return True
+
+        return False
+
+    @staticmethod
+    def get_normal(contact):
+        """
+        Returns the normal of a contact, pointing from body 'a' toward body
+        'b'. The normal of a Wall is used for wall contacts, and the normal
+        of a swept (t, nx, ny) contact for swept contacts. Otherwise the
+        normal is the direction between the centers of the two bodies, or
+        None if either body has no position and size.
+
+        :param contact: Contact object
+
+        :return: None or (float, float)
+        """
+        a, b, collision = contact.a, contact.b, contact.collision
+
+        if isinstance(a, Wall):
+            return a.get_normal_xy()
+
+        if isinstance(b, Wall):
+            nx, ny = b.get_normal_xy()
+
+            return -nx, -ny
+
+        if type(collision) is tuple and len(collision) == 3:
+            # swept contact normals point from 'b' toward 'a'
+            t, nx, ny = collision
+
+            return -nx, -ny
+
+        for item in (a, b):
+            if not (hasattr(item, "position") and hasattr(item, "size")):
+                return None
+
+        (ax, ay), (aw, ah) = a.position, a.size
+        (bx, by), (bw, bh) = b.position, b.size
+
+        return (bx + (bw / 2)) - (ax + (aw / 2)), (by + (bh / 2)) - (ay + (ah / 2))
+
+    @staticmethod
+    def get_velocity_xy(item):
+        physics = getattr(item, "physics", None)
+
+        if physics is None:
+            return 0, 0
+
+        v = physics.velocity
+
+        return v.i_hat, v.j_hat
+
+    def is_separating(self, contact):
+        # True if 'b' is moving away from 'a' along the contact normal, or
+        # if the contact has no normal
+        normal = self.get_normal(contact)
+        if normal is None:
+            return True
+
+        nx, ny = normal
+        ai, aj = self.get_velocity_xy(contact.a)
+        bi, bj = self.get_velocity_xy(contact.b)
+
+        return ((bi - ai) * nx) + ((bj - aj) * ny) > 0
+
+    def add(self, a, b, collision):
+        key = id(a), id(b)
+        contacts = self.contacts
+        name = con.CONTACT_PERSIST
+
+        if self.get_contact(key) is None:
+            name = con.CONTACT_BEGIN
+
+        contact = self.tested.pop(key, None)
+        if contact is None:
+            contact = contacts.get(key)
+
+            if contact is None or contact.collision is not collision:
+                contact = Contact(a, b, collision)
+
+        contacts[key] = contact
+        self.touched.add(key)
+
+        self.send_event(name, a, b, collision)
+
+    # called once per frame after the pairs have been handled
+    def update(self):
+        contacts, touched = self.contacts, self.touched
+
+        for key in [k for k in contacts if k not in touched]:
+            contact = contacts[key]
+            a, b = contact.a, contact.b
+
+            if contact.is_stale():
+                del contacts[key]
+
+            elif CollisionSystem.is_active_pair(a, b) or self.is_removed(a) or self.is_removed(b):
+                del contacts[key]
+                self.send_event(con.CONTACT_END, a, b, contact.collision)
+
+        touched.clear()
+        self.tested.clear()
+
+    # True for a body that's dead or has been removed from its group, so
+    # that inactive contacts don't keep it alive
+    @staticmethod
+    def is_removed(item):
+        return getattr(item, "dead", False) or getattr(item, "group", True) is None
+
+    def clear(self):
+        self.contacts = {}
+        self.tested = {}
+        self.touched = set()
+
+    @staticmethod
+    def send_event(name, a, b, collision):
+        for (item, other) in ((a, b), (b, a)):
+            event = getattr(item, "event", None)
+
+            if event is not None:
+                event.handle({
+                    NAME: name,
+                    con.OTHER: other,
+                    con.CONTACT: collision
+                })
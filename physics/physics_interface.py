@@ -1,14 +1,89 @@
+from math import sqrt
 from zsquirrel.context import ApplicationInterface
-from zsquirrel.utils.geometry import Vector, add_points
 from zsquirrel.entities import Group
-from zsquirrel.physics.physics import CollisionSystem
+from zsquirrel.physics.physics import CollisionSystem, BatchCollisionSystem, \
+    CollisionWorld, ContactCache, ALL_CATEGORIES, DEFAULT_CELL_SIZE
+from zsquirrel.physics.swept_collisions import CONTACT_SKIN, SWEEP_ITERATIONS, \
+    sweep_rect_rect, sweep_rect_wall, sweep_rect_walls
 
 
 class PhysicsInterface(ApplicationInterface):
     def set_collision_system(self, layer, test, handle, *groups):
         test = self.get_collision_method(test)
         handle = self.get_collision_method(handle)
+        groups = self.get_groups(groups)
 
+        cs = self.get_collision_system(test, handle, *groups)
+
+        layer.update_methods.append(cs.update)
+
+    # tests pairs on a shared pool of 'workers' threads, see
+    # CollisionSystem.update_parallel()
+    def set_parallel_collision_system(self, layer, workers, test, handle, *groups):
+        test = self.get_collision_method(test)
+        handle = self.get_collision_method(handle)
+        groups = self.get_groups(groups)
+
+        cs = self.get_collision_system(test, handle, *groups)
+        cs.workers = workers
+
+        layer.update_methods.append(cs.update)
+
+    # the 'test' method is passed both groups, see BatchCollisionSystem
+    def set_batch_collision_system(self, layer, test, handle, *groups):
+        test = self.get_collision_method(test)
+        handle = self.get_collision_method(handle)
+        groups = self.get_groups(groups)
+
+        cs = self.get_collision_system(
+            test, handle, *groups, cls=BatchCollisionSystem
+        )
+
+        layer.update_methods.append(cs.update)
+
+    # tests the sprites of the second group against the walls of the first
+    # with 'swept_walls_test', see swept_collisions.py
+    def set_swept_collision_system(self, layer, handle, walls, sprites):
+        handle = self.get_collision_method(handle)
+        walls, sprites = self.get_groups((walls, sprites))
+
+        cs = BatchCollisionSystem(
+            walls, sprites, self.swept_walls_test, handle,
+            iterations=SWEEP_ITERATIONS
+        )
+
+        layer.update_methods.append(cs.update)
+
+    # data = {
+    #   "groups":       [[group, category, mask], ...]      mask is optional
+    #   "rules":        [[category, category, test, handle], ...]
+    #   "cell_size":    int                                 optional
+    #   "contacts":     None or int or float                optional
+    # }
+    #
+    # the "contacts" key adds a ContactCache with the value as its threshold
+    def set_collision_world(self, layer, data):
+        world = CollisionWorld(data.get("cell_size", DEFAULT_CELL_SIZE))
+
+        for entry in data["groups"]:
+            group, category = entry[:2]
+            mask = entry[2] if len(entry) > 2 else ALL_CATEGORIES
+
+            world.add_group(self.get_groups((group,))[0], category, mask)
+
+        for (category_a, category_b, test, handle) in data["rules"]:
+            world.add_rule(
+                category_a, category_b,
+                self.get_collision_method(test),
+                self.get_collision_method(handle)
+            )
+
+        if "contacts" in data:
+            world.contacts = ContactCache(data["contacts"])
+
+        layer.update_methods.append(world.update)
+
+    def get_groups(self, groups):
         groups = list(groups)
         for g in groups:
             if type(g) is str:
@@ -18,9 +93,7 @@ class PhysicsInterface(ApplicationInterface):
                 self.context.set_value(name, group)
                 groups[groups.index(g)] = group
 
-        cs = self.get_collision_system(test, handle, *groups)
-
-        layer.update_methods.append(cs.update)
+        return groups
 
     def get_collision_method(self, method):
         if type(method) is str:
@@ -30,12 +103,12 @@ class PhysicsInterface(ApplicationInterface):
             return method
 
     @staticmethod
-    def get_collision_system(test, handle, *groups):
+    def get_collision_system(test, handle, *groups, cls=CollisionSystem):
         a = groups[0]
         b = None
         if len(groups) > 1:
             b = groups[1]
-        return CollisionSystem(
+        return cls(
             a, b, test, handle
         )
 
@@ -54,6 +127,57 @@ class PhysicsInterface(ApplicationInterface):
                 if collision:
                     return point
 
+    @staticmethod
+    def batch_wall_velocity_test(walls, sprites):
+        """
+        Runs wall_velocity_test() for every wall and sprite in a single
+        batched computation. Requires NumPy.
+
+        :param walls: iterable, [Wall, ...]
+        :param sprites: iterable, [Sprite, ...]
+
+        :return: list, [(wall, sprite, point), ...] for every colliding pair,
+            in the order a CollisionSystem would test them
+        """
+        from zsquirrel.utils import batch_geometry
+
+        walls = list(walls)
+        sprites = [s for s in sprites if not CollisionSystem.is_sleeping(s)]
+        owners, points, rays = [], [], []
+
+        for index, sprite in enumerate(sprites):
+            v = sprite.get_velocity().get_value()
+
+            for point in sprite.get_collision_points():
+                owners.append(index)
+                points.append(point)
+                rays.append(v)
+
+        if not (walls and points):
+            return []
+
+        segments = batch_geometry.get_segment_array(walls)
+        vectors = batch_geometry.get_point_array(rays)
+        hits = batch_geometry.segment_intersections(
+            segments, batch_geometry.get_point_array(points), vectors
+        )[1]
+
+        # only sprites moving into a wall are tested against it
+        normals = batch_geometry.get_normals(segments)
+        hits &= (normals @ vectors.T) < 0
+
+        collisions = []
+        found = set()
+
+        for w, p in zip(*hits.nonzero()):
+            pair = w, owners[p]
+
+            if pair not in found:
+                found.add(pair)
+                collisions.append((walls[w], sprites[owners[p]], points[p]))
+
+        return collisions
+
     @staticmethod
     def test_wall_collision(wall, sprite):
         s_test = PhysicsInterface.wall_skeleton_test(wall, sprite)
@@ -108,38 +232,30 @@ class PhysicsInterface(ApplicationInterface):
     @staticmethod
     def smooth_wall_collision(wall, sprite, point):
         v = sprite.get_velocity()
+        i, j = v.i_hat, v.j_hat
+        x, y = point
 
-        projected = v.apply_to_point(point)
-        adjustment = wall.get_normal_adjustment(
-            projected
-        )
-        adjustment = add_points(adjustment, v.get_value())
-        sprite.move(*adjustment)
-
-        normal = wall.get_normal()
-        sprite.physics.scale_movement_in_direction(
-            normal.get_angle(), 0)
+        dx, dy = wall.get_normal_adjustment_xy(x + i, y + j)
+        sprite.move(dx + i, dy + j)
 
+        nx, ny = wall.get_normal_xy()
+        sprite.physics.scale_movement_along_axis(nx, ny, 0)
 
     @staticmethod
     def bounce_wall_collision(wall, sprite, point):
         v = sprite.get_velocity()
+        x, y = point
 
         sprite.physics.apply_force(
-            *wall.get_normal_adjustment(
-                v.apply_to_point(point)
-            )
+            *wall.get_normal_adjustment_xy(x + v.i_hat, y + v.j_hat)
         )
 
-        normal = wall.get_normal()
-        v.scale_in_direction(
-            normal.get_angle() + .25, 0
-        )
+        nx, ny = wall.get_normal_xy()
+        v.project(nx, ny)
         v.scale(.5)
-        sprite.move(*v.get_value())
+        sprite.move(v.i_hat, v.j_hat)
 
-        sprite.physics.scale_movement_in_direction(
-            normal.get_angle(), -1)
+        sprite.physics.scale_movement_along_axis(nx, ny, -1)
 
     @staticmethod
     def sprite_sprite_collision(s1, s2):
@@ -151,28 +267,135 @@ class PhysicsInterface(ApplicationInterface):
     @staticmethod
     def handle_sprite_collision(sprite, other, collision):
         if collision:
-            def check_orientation(s):
+            cx, cy = collision
+
+            def do_adjustment(s, o):
                 x, y = s.get_center_of_mass()
-                cx, cy = collision
-                heading = Vector(cx - x, cy - y)
+                ox, oy = o.get_center_of_mass()
+                dx, dy = cx - ox, cy - oy
+                physics = s.physics
 
-                return s.get_velocity().check_orientation(heading)
+                if s.get_velocity().check_orientation_xy(cx - x, cy - y):
+                    m = sqrt((dx * dx) + (dy * dy))
 
-            def get_adjustment(o):
-                x, y = o.get_center_of_mass()
-                cx, cy = collision
-                v = Vector(cx - x, cy - y)
+                    if m:
+                        physics.scale_movement_along_axis(dx / m, dy / m, 0)
+                    else:
+                        physics.scale_movement_along_axis(1, 0, 0)
 
-                return v
+                e = 1 - physics.elasticity
+                physics.apply_force(dx * e, dy * e)
 
-            def do_adjustment(s, o):
-                v = get_adjustment(o)
+            do_adjustment(sprite, other)
+            do_adjustment(other, sprite)
+
+    # Swept collision methods. These test the movement of each sprite's rect
+    # from its Physics object's 'last_position' to its current position and
+    # resolve contacts at the time of impact, see swept_collisions.py
 
-                if check_orientation(s):
-                    s.physics.scale_movement_in_direction(v.get_angle(), 0)
+    @staticmethod
+    def get_sweep(sprite):
+        x, y = sprite.position
+        w, h = sprite.size
+        physics = getattr(sprite, "physics", None)
 
-                v.scale(1 - s.physics.elasticity)
-                s.physics.apply_force(*v.get_value())
+        if physics is None:
+            return x, y, w, h, 0, 0
 
-            do_adjustment(sprite, other)
-            do_adjustment(other, sprite)
+        lx, ly = physics.last_position
+
+        return lx, ly, w, h, x - lx, y - ly
+
+    @staticmethod
+    def swept_wall_test(wall, sprite):
+        return sweep_rect_wall(
+            *PhysicsInterface.get_sweep(sprite), wall
+        )
+
+    # for BatchCollisionSystem, returns only the earliest wall contact of each
+    # sprite. After a contact is resolved the sprite is tested again along the
+    # line from its last position to its resolved position
+    @staticmethod
+    def swept_walls_test(walls, sprites):
+        walls = list(walls)
+        collisions = []
+
+        for sprite in sprites:
+            if CollisionSystem.is_sleeping(sprite):
+                continue
+
+            earliest = sweep_rect_walls(
+                *PhysicsInterface.get_sweep(sprite), walls
+            )
+
+            if earliest:
+                wall, contact = earliest
+                collisions.append((wall, sprite, contact))
+
+        return collisions
+
+    @staticmethod
+    def slide_wall_contact(wall, sprite, contact):
+        PhysicsInterface.resolve_wall_contact(sprite, contact, 0)
+
+    @staticmethod
+    def bounce_wall_contact(wall, sprite, contact):
+        PhysicsInterface.resolve_wall_contact(
+            sprite, contact, -sprite.physics.elasticity
+        )
+
+    @staticmethod
+    def resolve_wall_contact(sprite, contact, scale):
+        """
+        Moves the sprite to its position at the time of impact, followed by
+        the rest of its displacement less the component into the wall, and
+        scales its velocity into the wall.
+
+        :param sprite: Sprite object
+        :param contact: (t, nx, ny)
+        :param scale: int or float, 0 to stop the sprite's movement into the
+            wall or a negative value to bounce it off
+        """
+        t, nx, ny = contact
+        lx, ly, w, h, dx, dy = PhysicsInterface.get_sweep(sprite)
+
+        r = 1 - t
+        ri, rj = dx * r, dy * r
+        d = (ri * nx) + (rj * ny)
+
+        if d < 0:
+            ri -= d * nx
+            rj -= d * ny
+
+        sprite.set_position(
+            lx + (dx * t) + ri + (nx * CONTACT_SKIN),
+            ly + (dy * t) + rj + (ny * CONTACT_SKIN)
+        )
+
+        physics = sprite.physics
+        if physics.velocity.dot(nx, ny) < 0:
+            physics.scale_movement_along_axis(nx, ny, scale)
+
+    @staticmethod
+    def swept_sprite_test(s1, s2):
+        return sweep_rect_rect(
+            *PhysicsInterface.get_sweep(s1),
+            *PhysicsInterface.get_sweep(s2)
+        )
+
+    @staticmethod
+    def handle_swept_sprite_collision(sprite, other, contact):
+        t, nx, ny = contact
+
+        for s, sign in ((sprite, 1), (other, -1)):
+            lx, ly, w, h, dx, dy = PhysicsInterface.get_sweep(s)
+            sx, sy = nx * sign, ny * sign
+
+            s.set_position(
+                lx + (dx * t) + (sx * CONTACT_SKIN),
+                ly + (dy * t) + (sy * CONTACT_SKIN)
+            )
+
+            physics = getattr(s, "physics", None)
+            if physics and physics.velocity.dot(sx, sy) < 0:
+                physics.scale_movement_along_axis(sx, sy, 0)
@@ -1,12 +1,23 @@
-from os.path import join
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from io import RawIOBase, SEEK_SET, SEEK_CUR, SEEK_END
+from os.path import join, exists, isdir, getsize
 from os import listdir
+from struct import Struct
+from threading import Lock
 from zsquirrel.utils.geometry import Rect
+from zsquirrel.utils.meters import Meter
 import json
+import mmap
+import pickle
 import pygame
 
 import zsquirrel.constants as con
 
 FILE_EXT_ERROR = "unrecognized file extension '{}'"
+DEFAULT_TRANSFORM_CACHE_BYTES = 32 * 1024 * 1024
+DEFAULT_RESOURCE_CACHE_BYTES = 256 * 1024 * 1024
+MISSING = object()
 
 pygame.init()
 pygame.mixer.quit()
@@ -20,12 +31,52 @@ class ResourceLoader:
     a function object instance based on the file type. Different loaders can be
     set at runtime and are used contextually load_resource() method.
     """
-    def __init__(self):
+    CACHE = None
+
+    def __init__(self, index_file=None, cache=None, archive=None, convert_images=False):
         """
-        Sets up a dict to match object loader methods to file extension keys
+        Sets up a dict to match object loader methods to file extension keys.
+
+        Loaded objects are stored in a ResourceCache, which is shared by
+        every ResourceLoader (and the Style and UI pre-render caches) unless
+        a separate cache is passed.
+
+        The 'file_index' dict maps each resource directory to a dict of
+        file names and their full relative paths. It's built lazily, one
+        directory at a time, the first time a file in that directory is
+        requested.
+
+        :param index_file: None or str, optional path of a JSON file that
+            the file index is loaded from and saved to, so that cold starts
+            can skip scanning the resource directories
+        :param cache: None or ResourceCache object
+        :param archive: None or ResourceArchive object. When an archive is
+            passed, its file index is used and files stored in the archive
+            are read from it instead of the resource directories. Loader
+            methods are then passed a file-like ArchiveFile object instead
+            of a path str.
+        :param convert_images: bool, if True, loaded images with per pixel
+            alpha are converted to the pixel format of the display surface
+            as they're added to the cache, so that blitting them doesn't
+            require a conversion every frame. See Image.convert() and
+            convert_cached_images()
         """
         self.loader_methods = {}
 
+        if cache is None:
+            cache = ResourceLoader.CACHE
+        self.cache = cache
+
+        self.index_file = index_file
+        self.file_index = None
+        self._index_lock = Lock()
+
+        self.archive = archive
+        if archive is not None:
+            self.file_index = archive.get_file_index()
+
+        self.convert_images = convert_images
+
     def get_path(self, directory, file_name):
         """
         Search for a file in a given directory and its subdirectories
@@ -43,22 +94,126 @@ class ResourceLoader:
         if con.RESOURCES not in directory:
             directory = join(con.RESOURCES, directory)
 
+        index = self.get_file_index(directory)
+
+        if file_name in index:
+            return index[file_name]
+
+        raise FileNotFoundError(join(directory, file_name))
+
+    def get_file_index(self, directory):
+        """
+        Returns the dict of file names and paths for a resource directory,
+        scanning the directory if it hasn't been indexed yet.
+
+        :param directory: str, full relative directory path
+
+        :return: dict, {file_name: path, ...}
+        """
+        file_index = self.file_index
+
+        if file_index is not None and directory in file_index:
+            return file_index[directory]
+
+        with self._index_lock:
+            if self.file_index is None:
+                self.file_index = {}
+
+                if self.index_file and exists(self.index_file):
+                    self.load_file_index(self.index_file)
+
+            if directory not in self.file_index:
+                self.file_index[directory] = self.index_directory(directory)
+
+                if self.index_file:
+                    self.save_file_index(self.index_file)
+
+            return self.file_index[directory]
+
+    @staticmethod
+    def index_directory(directory, index=None):
+        """
+        Recursively maps the names of files in a directory and its
+        subdirectories to their relative paths. Files higher in the tree
+        take precedence, then subdirectories in listing order, matching
+        the search order of the original recursive lookup.
+
+        :param directory: str
+        :param index: None or dict, the dict being built
+
+        :return: dict, {file_name: path, ...}
+        """
+        if index is None:
+            index = {}
+
         names = [f for f in listdir(directory) if f[0] not in "._"]
         files = [n for n in names if "." in n]
         dirs = [n for n in names if n not in files]
 
-        if file_name in files:
-            return join(directory, file_name)
+        for f in files:
+            index.setdefault(f, join(directory, f))
 
-        else:
-            for d in dirs:
-                try:
-                    return self.get_path(join(directory, d), file_name)
+        for d in dirs:
+            path = join(directory, d)
 
-                except FileNotFoundError:
-                    pass
+            if isdir(path):
+                ResourceLoader.index_directory(path, index)
 
-        raise FileNotFoundError(join(directory, file_name))
+        return index
+
+    def invalidate_file_index(self, directory=None):
+        """
+        Clears the file index for one resource directory, or every
+        directory, so that it's scanned again on the next lookup.
+
+        :param directory: None or str
+        """
+        with self._index_lock:
+            if directory is None or self.file_index is None:
+                self.file_index = {}
+
+            else:
+                if con.RESOURCES not in directory:
+                    directory = join(con.RESOURCES, directory)
+
+                self.file_index.pop(directory, None)
+
+            if self.index_file:
+                self.save_file_index(self.index_file)
+
+    def save_file_index(self, path):
+        file = open(path, "w")
+        json.dump(self.file_index, file)
+        file.close()
+
+    def load_file_index(self, path):
+        file = open(path, "r")
+        self.file_index = json.load(file)
+        file.close()
+
+    def get_resource_path(self, file_name):
+        """
+        Returns the full relative path of a file in the resource
+        subdirectory matched to its extension.
+
+        :param file_name: str, the name of any file in the appropriate
+            resources subdirectory
+
+        :return: str, the full relative file path
+        """
+        ext = file_name.split(".")[-1]
+
+        if ext == con.JSON:
+            return self.get_path(con.JSON, file_name)
+
+        elif ext in con.IMAGE_EXT:
+            return self.get_path(con.IMAGES, file_name)
+
+        elif ext in con.SOUND_EXT:
+            return self.get_path(con.SOUNDS, file_name)
+
+        else:
+            raise ValueError(FILE_EXT_ERROR.format(ext))
 
     def load_resource(self, file_name):
         """
@@ -72,39 +227,201 @@ class ResourceLoader:
         :return: object, the output of the appropriate loader method
         """
         ext = file_name.split(".")[-1]
+        path = self.get_resource_path(file_name)
+
+        return self.get_object(ext, path)
+
+    @staticmethod
+    def get_kind(ext):
+        """
+        Returns the resource kind used as a ResourceCache key for a file
+        extension. Unrecognized extensions are their own kind.
+
+        :param ext: str
 
+        :return: str
+        """
         if ext == con.JSON:
-            path = self.get_path(con.JSON, file_name)
+            return con.JSON
 
         elif ext in con.IMAGE_EXT:
-            path = self.get_path(con.IMAGES, file_name)
+            return con.IMAGES
 
         elif ext in con.SOUND_EXT:
-            path = self.get_path(con.SOUNDS, file_name)
+            return con.SOUNDS
 
         else:
-            raise ValueError(FILE_EXT_ERROR.format(ext))
-
-        return self.get_object(ext, path)
+            return ext
 
     def get_object(self, ext, path):
         """
+        Returns the object for a file from the ResourceCache, loading it
+        with read_object() and adding it to the cache if needed.
+
+        JSON data is stored in the cache in pickled form and each caller
+        gets a new copy, as data dicts are commonly mutated by their users.
+
         :param ext: str, the file extension, used as key for the
             loader_methods dict
         :param path: str, the full relative file path, passed to the
             method in the loader_methods dict
 
+        :return: object, the output of the appropriate loader method
+        """
+        kind = self.get_kind(ext)
+        obj = self.cache.get(kind, path, MISSING)
+
+        if obj is MISSING:
+            obj = self.read_object(ext, path)
+            self.add_to_cache(path, obj)
+
+        elif kind == con.JSON:
+            obj = pickle.loads(obj)
+
+        return obj
+
+    def read_object(self, ext, path):
+        """
+        Calls the loader method for a file without checking or updating
+        the ResourceCache. This can safely be called from worker threads.
+
+        :param ext: str, the file extension
+        :param path: str, the full relative file path
+
         :return: object, the output of the appropriate loader method
         """
         if ext in self.loader_methods:
             load = self.loader_methods[ext]
         else:
-            return ValueError(FILE_EXT_ERROR.format(ext))
+            raise ValueError(FILE_EXT_ERROR.format(ext))
+
+        archive = self.archive
+        if archive is not None and archive.has(path):
+            if archive.is_raw_image(path):
+                return archive.get_raw_image(path)
+
+            return load(archive.open(path))
 
         return load(path)
 
+    def add_to_cache(self, path, obj):
+        """
+        Adds a loaded object to the ResourceCache so that later calls to
+        load_resource() for the same path return it without reading the file.
+
+        :param path: str, the full relative file path
+        :param obj: object, the output of the appropriate loader method
+        """
+        kind = self.get_kind(path.split(".")[-1])
+        size = None
+
+        if kind == con.JSON:
+            obj = pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)
+
+        elif kind == con.IMAGES and self.convert_images:
+            obj.convert()
+
+        elif kind not in (con.IMAGES, con.SOUNDS) and exists(path):
+            size = getsize(path)
+
+        self.cache.put(kind, path, obj, size=size)
+
+    def convert_cached_images(self):
+        """
+        Converts every Image in the ResourceCache that needs it to the pixel
+        format of the display surface (see Image.convert). This should be
+        called once the display has been created if images were loaded before
+        it existed, and before the environment is loaded.
+
+        The Image objects are converted in place, but surfaces that were
+        derived from them before the conversion, such as subsurfaces set by
+        'set_image', compiled animation frames and tile map cells, keep
+        referencing the unconverted pixels. The transform cache and the
+        compiled AnimationSets are cleared so that they're built again from
+        the converted surfaces, and the cache's byte count is updated.
+
+        :return: int, the number of images that were converted
+        """
+        # imported here as the animations package depends on this module
+        from zsquirrel.animations.animation_interface import AnimationInterface
+
+        if not pygame.display.get_surface():
+            return 0
+
+        n = 0
+        cache = self.cache
+        for (kind, key), (obj, size) in list(cache.items.items()):
+            if kind == con.IMAGES and obj.convert():
+                cache.resize(kind, key)
+                n += 1
+
+        if n:
+            Image.TRANSFORM_CACHE.clear()
+            AnimationInterface.clear_animation_sets()
+            cache.evict()
+
+        return n
+
+    def is_loaded(self, path):
+        kind = self.get_kind(path.split(".")[-1])
+
+        return self.cache.has(kind, path)
+
+    @staticmethod
+    def get_resource_references(data):
+        """
+        Recursively scans a data object for str values that name a resource
+        file with a recognized extension.
+
+        :param data: obj, generic data such as an environment dict
+
+        :return: list, [file_name, ...] in order of first reference
+        """
+        exts = (con.JSON,) + con.IMAGE_EXT + con.SOUND_EXT
+        references = []
+        found = set()
+
+        def scan(value):
+            if type(value) in (list, tuple):
+                for item in value:
+                    scan(item)
+
+            elif type(value) is dict:
+                for item in value.values():
+                    scan(item)
+
+            elif type(value) is str and "." in value:
+                if value.split(".")[-1] in exts and value not in found:
+                    found.add(value)
+                    references.append(value)
+
+        scan(data)
+
+        return references
+
+    def preload(self, *items, workers=None):
+        """
+        Starts a ResourceLoadJob that reads and decodes every resource file
+        referenced by the items passed on a pool of worker threads. JSON
+        files are scanned for further references as they are loaded.
+
+        :param items: (str or obj, ...), file names or data objects
+            to be scanned for resource references
+        :param workers: None or int, the number of worker threads
+
+        :return: ResourceLoadJob object
+        """
+        file_names = []
+
+        for item in items:
+            for file_name in self.get_resource_references(item):
+                if file_name not in file_names:
+                    file_names.append(file_name)
+
+        return ResourceLoadJob(self, file_names, workers=workers)
+
     @classmethod
-    def get_default_loader(cls):
+    def get_default_loader(cls, index_file=None, archive=None, convert_images=False):
         """
         This method helps generate the appropriate loader_methods to
         match typical file_extensions to the default ZSquirrel library
@@ -114,6 +431,10 @@ class ResourceLoader:
         through wrapper classes based around the Pygame library.
 
         JSON data is also supported, being loaded as a standard dict object
+
+        :param index_file: None or str, see ResourceLoader.__init__()
+        :param archive: None or ResourceArchive object, see ResourceLoader.__init__()
+        :param convert_images: bool, see ResourceLoader.__init__()
         """
         methods = {}
 
@@ -130,6 +451,9 @@ class ResourceLoader:
         # JSON
 
         def load_json(path):
+            if type(path) is not str:
+                return json.load(path)
+
             file = open(path, "r")
             d = json.load(file)
             file.close()
@@ -137,18 +461,692 @@ class ResourceLoader:
             return d
 
         methods[con.JSON] = load_json
-        resource_loader = cls()
+        resource_loader = cls(
+            index_file=index_file, archive=archive,
+            convert_images=convert_images
+        )
         resource_loader.loader_methods.update(methods)
 
         return resource_loader
 
     @staticmethod
     def clear_default_caches():
-        Image.LOADED_IMAGES = {}
+        """
+        Clears the default ResourceCache and the transform cache, as well as
+        the AnimationSets compiled from cached sprite sheets, which would
+        otherwise keep the cleared surfaces alive.
+        """
+        # imported here as the animations package depends on this module
+        from zsquirrel.animations.animation_interface import AnimationInterface
+
+        ResourceLoader.CACHE.clear()
+        Image.TRANSFORM_CACHE.clear()
+        AnimationInterface.clear_animation_sets()
+
+
+class ResourceLoadJob:
+    """
+    A ResourceLoadJob loads a set of resource files on a pool of worker
+    threads and hands them over to the ResourceLoader on the thread that
+    calls update(), typically once per frame from the game loop. This lets
+    a loading screen environment keep updating while the resources for the
+    next environment are read and decoded.
+
+    Progress is tracked by a Meter object whose maximum grows as JSON files
+    are loaded and scanned for further resource references.
+    """
+    def __init__(self, loader, file_names, workers=None):
+        """
+        :param loader: ResourceLoader object
+        :param file_names: list, [str, ...]
+        :param workers: None or int, the number of worker threads
+        """
+        self.loader = loader
+        self.meter = Meter("{} meter".format(self.__class__.__name__), 0, 0, 0)
+        self.errors = []
+
+        self.submitted = set()
+        self.futures = {}
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+
+        for file_name in file_names:
+            self.submit(file_name)
+
+        if not self.futures:
+            self.executor.shutdown(wait=False)
+
+    def __repr__(self):
+        return "{}: {}/{} files".format(
+            self.__class__.__name__,
+            self.meter.value, self.meter.maximum
+        )
+
+    def submit(self, file_name):
+        if file_name in self.submitted:
+            return
+
+        self.submitted.add(file_name)
+        self.meter.maximum += 1
+        future = self.executor.submit(self.read_resource, file_name)
+        self.futures[future] = file_name
+
+    def read_resource(self, file_name):
+        """
+        Called on a worker thread. Returns the resource's path and loaded
+        object, or only the path if the resource has already been loaded.
+
+        :param file_name: str
+
+        :return: (str, object or None)
+        """
+        loader = self.loader
+        path = loader.get_resource_path(file_name)
+
+        if loader.is_loaded(path):
+            return path, None
+
+        ext = file_name.split(".")[-1]
+
+        return path, loader.read_object(ext, path)
+
+    def handle_result(self, future):
+        file_name = self.futures.pop(future)
+        self.meter.value += 1
+
+        try:
+            path, obj = future.result()
+
+        except (IOError, ValueError, pygame.error) as e:
+            self.errors.append((file_name, e))
+            return
+
+        if obj is not None:
+            self.loader.add_to_cache(path, obj)
+
+        if file_name.split(".")[-1] == con.JSON:
+            if obj is None:
+                obj = self.loader.get_object(con.JSON, path)
+
+            for reference in self.loader.get_resource_references(obj):
+                self.submit(reference)
+
+    def update(self):
+        """
+        Hands over every resource that has finished loading and submits any
+        new references found in loaded JSON files. Returns True once every
+        file has been handled.
+
+        :return: bool
+        """
+        for future in [f for f in self.futures if f.done()]:
+            self.handle_result(future)
+
+        done = self.is_done()
+        if done:
+            self.executor.shutdown(wait=False)
+
+        return done
+
+    def wait(self):
+        """
+        Blocks until every resource has been loaded and handed over.
+        """
+        while self.futures:
+            finished, pending = wait(self.futures, return_when=FIRST_COMPLETED)
+
+            for future in finished:
+                self.handle_result(future)
+
+        self.executor.shutdown(wait=False)
+
+    def is_done(self):
+        return not self.futures
+
+    def get_progress(self):
+        if self.meter.maximum == 0:
+            return 1.0
+
+        return self.meter.get_ratio()
+
+
+class ResourceCache:
+    """
+    The ResourceCache stores loaded resources of every kind (images, sounds,
+    JSON data, fonts, UI pre-renders) under (kind, key) pairs, with an
+    approximate byte count for each entry.
+
+    When the total byte count exceeds 'max_bytes' the least recently used
+    entries are evicted, except for pinned entries. While the 'pinning' flag
+    is set, every entry that is added or requested is pinned. The Context
+    object uses this to pin the resources referenced by the live environment
+    while it's being populated.
+
+    Hit, miss, eviction and memory statistics are kept for each kind.
+    """
+    STAT_KEYS = "count", "bytes", "hits", "misses", "evictions", "pinned"
+
+    def __init__(self, max_bytes=DEFAULT_RESOURCE_CACHE_BYTES):
+        """
+        :param max_bytes: int, the memory budget for cached resources
+        """
+        self.max_bytes = max_bytes
+        self.bytes = 0
+
+        self.items = OrderedDict()
+        self.pinned = set()
+        self.pinning = False
+        self.stats = {}
+
+    def __repr__(self):
+        return "{}: {} items, {}/{} bytes".format(
+            self.__class__.__name__, len(self.items),
+            self.bytes, self.max_bytes
+        )
+
+    def __len__(self):
+        return len(self.items)
+
+    def get_kind_stats(self, kind):
+        if kind not in self.stats:
+            self.stats[kind] = {k: 0 for k in ResourceCache.STAT_KEYS}
+
+        return self.stats[kind]
+
+    def get_stats(self):
+        """
+        Returns a copy of the statistics for each kind of resource, plus
+        a 'total' entry with the overall byte count and budget.
+
+        :return: dict
+        """
+        stats = {kind: self.stats[kind].copy() for kind in self.stats}
+        stats["total"] = {
+            "count": len(self.items),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "pinned": len(self.pinned)
+        }
+
+        return stats
+
+    @staticmethod
+    def get_size(kind, obj):
+        """
+        Returns an approximate byte count for a resource object.
+
+        :param kind: str
+        :param obj: object
+
+        :return: int
+        """
+        if isinstance(obj, Image):
+            surface = obj.pygame_surface
+            if surface.get_parent() is not None:
+                return 0
+
+            w, h = surface.get_size()
+
+            return w * h * surface.get_bytesize()
+
+        if isinstance(obj, Sound):
+            mixer = pygame.mixer.get_init()
+            if not mixer:
+                return 0
+
+            frequency, size, channels = mixer
+
+            return int(obj.pygame_sound.get_length() * frequency * channels * (abs(size) // 8))
+
+        if type(obj) is bytes:
+            return len(obj)
+
+        return 0
+
+    def has(self, kind, key):
+        return (kind, key) in self.items
+
+    def get(self, kind, key, default=None):
+        """
+        Returns a cached resource and marks it as recently used.
+
+        :param kind: str
+        :param key: hashable
+        :param default: returned if there is no entry
+
+        :return: object
+        """
+        item_key = kind, key
+        stats = self.get_kind_stats(kind)
+
+        if item_key in self.items:
+            self.items.move_to_end(item_key)
+            stats["hits"] += 1
+
+            if self.pinning:
+                self.pin(kind, key)
+
+            return self.items[item_key][0]
+
+        stats["misses"] += 1
+
+        return default
+
+    def put(self, kind, key, obj, size=None):
+        """
+        Adds a resource to the cache, then evicts least recently used
+        entries until the cache is back under budget.
+
+        :param kind: str
+        :param key: hashable
+        :param obj: object
+        :param size: None or int, byte count, estimated if None
+        """
+        if size is None:
+            size = self.get_size(kind, obj)
+
+        self.remove(kind, key)
+
+        self.items[kind, key] = obj, size
+        stats = self.get_kind_stats(kind)
+        stats["count"] += 1
+        stats["bytes"] += size
+        self.bytes += size
+
+        if self.pinning:
+            self.pin(kind, key)
+
+        self.evict()
+
+    def resize(self, kind, key, size=None):
+        """
+        Updates the byte count of an entry whose object was changed in
+        place, without changing its position in the LRU order or its pin.
+
+        :param kind: str
+        :param key: hashable
+        :param size: None or int, byte count, estimated if None
+        """
+        item_key = kind, key
+        obj, old = self.items[item_key]
+
+        if size is None:
+            size = self.get_size(kind, obj)
+
+        self.items[item_key] = obj, size
+        self.get_kind_stats(kind)["bytes"] += size - old
+        self.bytes += size - old
+
+    def remove(self, kind, key):
+        item_key = kind, key
+
+        if item_key in self.items:
+            obj, size = self.items.pop(item_key)
+            stats = self.get_kind_stats(kind)
+            stats["count"] -= 1
+            stats["bytes"] -= size
+            self.bytes -= size
+
+            self.unpin(kind, key)
+
+    def pin(self, kind, key):
+        item_key = kind, key
+
+        if item_key in self.items and item_key not in self.pinned:
+            self.pinned.add(item_key)
+            self.get_kind_stats(kind)["pinned"] += 1
+
+    def unpin(self, kind, key):
+        item_key = kind, key
+
+        if item_key in self.pinned:
+            self.pinned.remove(item_key)
+            self.get_kind_stats(kind)["pinned"] -= 1
+
+    def unpin_all(self):
+        self.pinned = set()
+
+        for stats in self.stats.values():
+            stats["pinned"] = 0
+
+    def set_max_bytes(self, value):
+        self.max_bytes = value
+        self.evict()
+
+    def evict(self):
+        excess = self.bytes - self.max_bytes
+        if excess <= 0:
+            return
+
+        evicted = []
+        freed = 0
+
+        for item_key, (obj, size) in self.items.items():
+            if freed >= excess:
+                break
+
+            if item_key not in self.pinned:
+                evicted.append(item_key)
+                freed += size
+
+        for kind, key in evicted:
+            self.remove(kind, key)
+            self.get_kind_stats(kind)["evictions"] += 1
+
+    def clear(self, kind=None):
+        """
+        Removes every entry, or every entry of one kind.
+
+        :param kind: None or str
+        """
+        for k, key in [i for i in self.items if kind is None or i[0] == kind]:
+            self.remove(k, key)
+
+
+class TransformCache:
+    """
+    A bounded LRU cache of transformed Image objects. Each entry is keyed by
+    the source surface, the section rect, mirror flags, rotation and scale so
+    that sections of a sprite sheet can be cut and transformed once and then
+    blitted directly on every following frame.
+
+    The size of the cache is bound by an approximate byte count of the pixel
+    data held by each cached surface. Subsurfaces share the pixels of their
+    parent surface, but are charged for the area they cover so that they
+    are evicted like any other entry rather than pinning their source
+    surface indefinitely.
+    """
+    def __init__(self, max_bytes=DEFAULT_TRANSFORM_CACHE_BYTES):
+        """
+        :param max_bytes: int, the memory cap for cached pixel data
+        """
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+        self.items = OrderedDict()
+
+    def __repr__(self):
+        return "{}: {} items, {}/{} bytes, {} hits, {} misses".format(
+            self.__class__.__name__, len(self.items),
+            self.bytes, self.max_bytes, self.hits, self.misses
+        )
+
+    def __len__(self):
+        return len(self.items)
+
+    def set_max_bytes(self, value):
+        self.max_bytes = value
+        self.evict()
+
+    def clear(self):
+        self.items = OrderedDict()
+        self.bytes = 0
+
+    def reset_counters(self):
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def get_bytes(image):
+        surface = image.pygame_surface
+        w, h = surface.get_size()
+
+        return w * h * surface.get_bytesize()
+
+    def evict(self):
+        items = self.items
+
+        while items and self.bytes > self.max_bytes:
+            source, image, size = items.popitem(last=False)[1]
+            self.bytes -= size
+
+    def get_image(self, image, rect=None, mirror=(False, False), rotate=0, scale=1):
+        """
+        Returns the transformed Image for a given source Image, creating
+        and caching it if it's not already stored.
+
+        :param image: Image object, the source image
+        :param rect: None or Rect object, the section of the source image
+        :param mirror: (bool, bool), flip transform on the x and y axes
+        :param rotate: float, clockwise rotations
+        :param scale: int or float
+
+        :return: Image object
+        """
+        source = image.pygame_surface
+        mx, my = mirror
+        section = None
+        if rect is not None:
+            section = tuple(rect.position) + tuple(rect.size)
+
+        key = id(source), section, bool(mx), bool(my), rotate, scale
+        items = self.items
+
+        if key in items:
+            entry = items[key]
+
+            # a stored reference to the source keeps its id from being
+            # reused, but check it in case the entry is stale
+            if entry[0] is source:
+                items.move_to_end(key)
+                self.hits += 1
+
+                return entry[1]
+
+            self.bytes -= entry[2]
+
+        self.misses += 1
+        transformed = image.get_transformed(rect, mirror, rotate, scale)
+        size = self.get_bytes(transformed)
+
+        items[key] = source, transformed, size
+        self.bytes += size
+        self.evict()
+
+        return transformed
+
+
+class ArchiveFile(RawIOBase):
+    """
+    A read-only, seekable file-like view of a single file stored in a
+    ResourceArchive. Reads are copied straight out of the archive's memory
+    map, so no data is read from disk until it's requested.
+    """
+    def __init__(self, view, name):
+        """
+        :param view: memoryview of the file's bytes
+        :param name: str, the file's full relative path
+        """
+        super(ArchiveFile, self).__init__()
+        self.view = view
+        self.name = name
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        start = self.position
+        end = min(start + len(buffer), len(self.view))
+        n = end - start
+
+        buffer[:n] = self.view[start:end]
+        self.position = end
+
+        return n
+
+    def seek(self, offset, whence=SEEK_SET):
+        if whence == SEEK_CUR:
+            offset += self.position
+
+        elif whence == SEEK_END:
+            offset += len(self.view)
+
+        self.position = max(offset, 0)
+
+        return self.position
+
+    def tell(self):
+        return self.position
+
+
+class ResourceArchive:
+    """
+    A ResourceArchive packs every file in the resources directory into a
+    single indexed file that's read through a memory map at runtime, which
+    avoids opening thousands of small files individually.
+
+    The archive starts with a header (magic bytes, version and index size),
+    then a JSON index and then the file data. The index stores the file
+    index used by ResourceLoader.get_path() and an entry for each path with
+    the offset and length of its data. Images can optionally be stored as
+    raw RGBA pixel data which is turned into a surface that references the
+    memory map directly, skipping image decoding.
+
+    Archives are built with the 'build' class method:
+        ResourceArchive.build("resources.zsa", raw_images=True)
+    """
+    MAGIC = b"ZSQA"
+    VERSION = 1
+    HEADER = Struct("<4sIQ")
+    ALIGN = 16
+    RAW_FORMAT = "RGBA"
+
+    def __init__(self, path):
+        """
+        Opens an archive file and reads its index.
+
+        :param path: str, path of the archive file
+        """
+        self.path = path
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_COPY)
+        self.view = memoryview(self.map)
+
+        magic, version, index_size = self.HEADER.unpack_from(self.map, 0)
+        if magic != self.MAGIC or version != self.VERSION:
+            raise ValueError("{} is not a version {} resource archive".format(
+                path, self.VERSION
+            ))
+
+        start = self.HEADER.size
+        index = json.loads(bytes(self.view[start:start + index_size]))
+
+        self.data_offset = start + index_size
+        self.file_index = index["file_index"]
+        self.entries = index["entries"]
+
+    def __repr__(self):
+        return "{}: {} ({} files)".format(
+            self.__class__.__name__, self.path, len(self.entries)
+        )
+
+    def close(self):
+        self.view.release()
+        self.map.close()
+        self.file.close()
+
+    def get_file_index(self):
+        return {d: self.file_index[d].copy() for d in self.file_index}
+
+    def has(self, path):
+        return path in self.entries
+
+    def is_raw_image(self, path):
+        return self.entries[path][2] is not None
+
+    def get_view(self, path):
+        offset, length, raw = self.entries[path]
+        offset += self.data_offset
+
+        return self.view[offset:offset + length]
+
+    def open(self, path):
+        return ArchiveFile(self.get_view(path), path)
+
+    def get_raw_image(self, path):
+        size = self.entries[path][2]
+        surface = pygame.image.frombuffer(
+            self.get_view(path), tuple(size), self.RAW_FORMAT
+        )
+
+        return Image(surface)
+
+    @classmethod
+    def build(cls, path, directory=con.RESOURCES, raw_images=False):
+        """
+        Packs the json, images and sounds subdirectories of a resources
+        directory into an archive file.
+
+        :param path: str, path of the archive file to write
+        :param directory: str, the resources directory
+        :param raw_images: bool, store images as raw RGBA pixel data
+            instead of their encoded file data
+
+        :return: int, the number of files packed
+        """
+        file_index = {}
+        for sub in (con.JSON, con.IMAGES, con.SOUNDS):
+            d = join(directory, sub)
+
+            if isdir(d):
+                file_index[d] = ResourceLoader.index_directory(d)
+
+        paths = []
+        for d in file_index:
+            for p in file_index[d].values():
+                if p not in paths:
+                    paths.append(p)
+
+        entries = {}
+        blobs = []
+        offset = 0
+
+        for p in paths:
+            raw = None
+
+            if raw_images and p.split(".")[-1] in con.IMAGE_EXT:
+                surface = pygame.image.load(p)
+                raw = surface.get_size()
+                data = pygame.image.tobytes(surface, cls.RAW_FORMAT)
+
+            else:
+                file = open(p, "rb")
+                data = file.read()
+                file.close()
+
+            padding = -offset % cls.ALIGN
+            offset += padding
+            blobs.append(bytes(padding))
+            blobs.append(data)
+
+            entries[p] = offset, len(data), raw
+            offset += len(data)
+
+        index = json.dumps({
+            "file_index": file_index,
+            "entries": entries
+        }).encode()
+
+        # pad the index so the data section starts on an aligned offset
+        index += b" " * (-(cls.HEADER.size + len(index)) % cls.ALIGN)
+
+        file = open(path, "wb")
+        file.write(cls.HEADER.pack(cls.MAGIC, cls.VERSION, len(index)))
+        file.write(index)
+        for blob in blobs:
+            file.write(blob)
+        file.close()
+
+        return len(entries)
 
 
 class Image:
-    LOADED_IMAGES = {}
+    TRANSFORM_CACHE = TransformCache()
 
     def __init__(self, pygame_surface):
         if type(pygame_surface) is Image:
@@ -180,9 +1178,76 @@ class Image:
             (True, True): self._xy_flip
         }[(x, y)]
 
+    def convert(self):
+        """
+        Converts an image with per pixel alpha to the pixel format of the
+        display surface in place, unless it already matches it.
+
+        Opaque images are left as they are, as blitting converted 24 bit
+        images was measured to be slower than blitting the originals.
+        Nothing is done if there's no display surface (e.g. in headless
+        runs) or if the image is a subsurface.
+
+        :return: bool, True if the image was converted
+        """
+        surface = self.pygame_surface
+        display = pygame.display.get_surface()
+
+        if not display or surface.get_parent():
+            return False
+
+        if not surface.get_flags() & pygame.SRCALPHA:
+            return False
+
+        if surface.get_bytesize() == 4 and surface.get_masks()[:3] == display.get_masks()[:3]:
+            return False
+
+        surface = surface.convert_alpha()
+
+        self.pygame_surface = surface
+        self.get_size = surface.get_size
+
+        self._x_flip = None
+        self._y_flip = None
+        self._xy_flip = None
+
+        return True
+
     def subsurface(self, rect):
         return Image(self.pygame_surface.subsurface(rect.pygame_rect))
 
+    def get_transformed(self, rect=None, mirror=(False, False), rotate=0, scale=1):
+        """
+        Returns a new Image with a section, flip, rotation and scale applied in
+        that order. Rotations are clockwise, in full turns, and expand the
+        image to fit the rotated section.
+
+        :param rect: None or Rect object
+        :param mirror: (bool, bool)
+        :param rotate: float
+        :param scale: int or float
+
+        :return: Image object
+        """
+        surface = self.pygame_surface
+
+        if rect is not None:
+            surface = surface.subsurface(rect.pygame_rect)
+
+        mx, my = mirror
+        if mx or my:
+            surface = pygame.transform.flip(surface, mx, my)
+
+        if rotate:
+            surface = pygame.transform.rotate(surface, -rotate * 360)
+
+        if scale != 1:
+            w, h = surface.get_size()
+            size = int(w * scale), int(h * scale)
+            surface = pygame.transform.scale(surface, size)
+
+        return Image(surface)
+
     def get_scaled(self, scale):
         w, h = self.get_size()
         w *= scale
@@ -239,15 +1304,10 @@ class Image:
 
     @staticmethod
     def get_from_file(path):
-        if path in Image.LOADED_IMAGES:
-            return Image.LOADED_IMAGES[path]
+        # 'path' can also be a file-like object with a 'name' attribute
+        image = pygame.image.load(path, getattr(path, "name", ""))  # PYGAME CHOKE POINT
 
-        else:
-            image = pygame.image.load(path)  # PYGAME CHOKE POINT
-            image = Image(image)
-            Image.LOADED_IMAGES[path] = image
-
-        return image
+        return Image(image)
 
 
 class Sound:
@@ -259,3 +1319,6 @@ class Sound:
     @staticmethod
     def get_from_file(path):
         return Sound(pygame.mixer.Sound(path))
+
+
+ResourceLoader.CACHE = ResourceCache()
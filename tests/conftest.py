@@ -0,0 +1,5 @@
+import os
+
+# run pygame without a display or audio device
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
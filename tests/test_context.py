@@ -0,0 +1,117 @@
+from zsquirrel import constants as con
+from zsquirrel.context import Context, EnvironmentLoader, SpritePool
+from zsquirrel.entities import Layer, Sprite
+from zsquirrel.physics.physics import ContactCache, Physics
+from zsquirrel.utils.geometry import Vector, Wall
+
+
+class Loader:
+    """
+    Stands in for the EnvironmentLoader methods used by a SpritePool
+    """
+    recording = None
+
+    def __init__(self, group):
+        self.group = group
+
+    @staticmethod
+    def add_entity(name, cls):
+        return cls(name)
+
+    def set_entity_attributes(self, sprite, entry, init=False):
+        sprite.size = tuple(entry["size"])
+        sprite.position = tuple(entry["position"])
+        sprite.set_group(self.group)
+
+    @staticmethod
+    def apply_interfaces(sprite, entry):
+        sprite.physics = Physics(sprite, 1, 0, 0, 0)
+        sprite.physics.last_position = sprite.position
+
+
+def get_pool():
+    layer = Layer("layer")
+    layer.set_groups("group")
+    pool = SpritePool(Loader(layer.groups[0]), {
+        con.NAME: "bullet",
+        con.CLASS: Sprite,
+        "size": [10, 10],
+        "position": [5, 5]
+    })
+
+    return layer, pool
+
+
+def test_reused_pooled_sprite_has_its_physics_reset():
+    layer, pool = get_pool()
+    sprite = pool.get()
+    physics = sprite.physics
+
+    physics.velocity = Vector(3, -2)
+    physics.force = Vector(1, 1)
+    physics.sleep()
+    sprite.position = 40, 70
+    physics.last_position = 37, 72
+
+    sprite.dead = True
+    layer.update()
+    assert pool.free
+
+    reused = pool.get()
+    physics = reused.physics
+
+    assert reused is sprite
+    assert reused.position == (5, 5)
+    assert physics.velocity.get_value() == (0, 0)
+    assert physics.force.get_value() == (0, 0)
+    assert physics.last_position == (5, 5)
+    assert not physics.sleeping
+    assert physics.rest_frames == 0
+    assert reused in layer.get_sprites()
+
+
+def test_reused_pooled_sprite_starts_without_cached_contacts():
+    layer, pool = get_pool()
+    sprite = pool.get()
+    wall = Wall((0, 20), (40, 20))
+
+    cache = ContactCache(1)
+    cache.test(wall, sprite, lambda a, b: True)
+    cache.add(wall, sprite, True)
+    cache.update()
+
+    sprite.dead = True
+    layer.update()
+    reused = pool.get()
+
+    events = []
+    reused.on_contact_begin = events.append
+    tests = []
+
+    def test(a, b):
+        tests.append((a, b))
+        return True
+
+    assert cache.test(wall, reused, test)
+    cache.add(wall, reused, True)
+
+    assert tests == [(wall, reused)]
+    assert [e[con.NAME] for e in events] == [con.CONTACT_BEGIN]
+
+
+def test_get_value_resolves_keys_added_to_a_reused_value():
+    context = Context(None, None, EnvironmentLoader, {}, [])
+    hero = object()
+    context.set_value("hero", hero)
+
+    value = [1, "x"]
+    data = {"a": 1}
+    for i in range(2):
+        assert context.get_value(value) == [1, "x"]
+        assert context.get_value(data) == {"a": 1}
+
+    value[0] = "hero"
+    data["a"] = "hero"
+
+    assert context.get_value(value) == [hero, "x"]
+    assert context.get_value(data) == {"a": hero}
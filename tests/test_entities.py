@@ -0,0 +1,27 @@
+from zsquirrel.entities import Layer, Sprite
+
+
+def test_layer_without_groups_updates_and_draws():
+    layer = Layer("layer")
+
+    layer.update()
+
+    assert layer.get_sprites() == []
+    assert layer.get_graphics() == []
+
+
+def test_layer_sprite_list_follows_group_changes():
+    layer = Layer("layer")
+    layer.set_groups("group")
+    group = layer.groups[0]
+
+    sprite = Sprite("sprite")
+    sprite.set_group(group)
+    sprites = layer.get_sprites()
+
+    assert sprites == [sprite]
+    assert layer.get_sprites() is sprites
+
+    layer.remove_sprite(sprite)
+
+    assert layer.get_sprites() == []
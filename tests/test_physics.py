@@ -0,0 +1,131 @@
+from zsquirrel import constants as con
+from zsquirrel.entities import Group, Layer, Sprite
+from zsquirrel.physics.physics import CollisionWorld, ContactCache, Physics
+from zsquirrel.physics.physics_interface import PhysicsInterface
+from zsquirrel.utils.geometry import Vector, Wall
+
+
+def get_body(name, position, size=(10, 10)):
+    sprite = Sprite(name)
+    sprite.size = size
+    sprite.position = position
+    sprite.physics = Physics(sprite, 1, 0, 0, 0)
+
+    return sprite
+
+
+def test_collision_filter_only_applies_to_its_own_item():
+    group = Group("group")
+    for name in "abc":
+        group.add_member(get_body(name, (0, 0)))
+    group[0].collision_filter = 4, 4
+
+    world = CollisionWorld()
+    world.add_group(group, 1, 1)
+
+    bodies = [(item.name, c, m) for (item, c, m) in world.get_bodies()]
+
+    assert bodies == [("a", 4, 4), ("b", 1, 1), ("c", 1, 1)]
+
+
+def test_swept_sprite_is_paired_with_wall_it_moved_through():
+    # a sprite that moved from x = 0 to x = 100 in one frame, through a
+    # wall at x = 50 facing left
+    sprite = get_body("sprite", (0, 0))
+    sprite.physics.velocity = Vector(100, 0)
+    sprite.physics.last_position = 0, 0
+    sprite.position = 100, 0
+
+    wall = Wall((50, 50), (50, -50))
+    walls, sprites = Group("walls"), Group("sprites")
+    walls.add_member(wall)
+    sprites.add_member(sprite)
+
+    contacts = []
+    world = CollisionWorld()
+    world.add_group(walls, 1, 2)
+    world.add_group(sprites, 2, 1)
+    world.add_rule(
+        1, 2, PhysicsInterface.swept_wall_test,
+        lambda w, s, contact: contacts.append(contact)
+    )
+    world.update()
+
+    assert len(contacts) == 1
+    assert abs(contacts[0][0] - .4) < 1e-9
+
+
+def test_cached_contact_is_only_reused_while_not_separating():
+    box = get_body("box", (0, 390))
+    wall = Wall((-100, 400), (100, 400))
+    cache = ContactCache()
+    calls = []
+
+    def test(w, s):
+        calls.append(s.position)
+        return s.position
+
+    # pressing into the wall, the cached collision is reused
+    box.physics.velocity = Vector(0, .5)
+    cache.test(wall, box, test)
+    cache.add(wall, box, (0, 400))
+    cache.update()
+    cache.test(wall, box, test)
+
+    assert len(calls) == 1
+
+    # moving away from the wall by less than the threshold, it's tested again
+    box.physics.velocity = Vector(0, -.2)
+    box.position = 0, 389.8
+    cache.test(wall, box, test)
+
+    assert len(calls) == 2
+
+
+def test_cached_contact_with_wall_as_second_body():
+    box = get_body("box", (0, 390))
+    wall = Wall((-100, 400), (100, 400))
+    cache = ContactCache()
+    calls = []
+
+    def test(s, w):
+        calls.append(s.position)
+        return s.position
+
+    box.physics.velocity = Vector(0, .5)
+    cache.test(box, wall, test)
+    cache.add(box, wall, (0, 400))
+    cache.update()
+    cache.test(box, wall, test)
+
+    assert len(calls) == 1
+
+    box.physics.velocity = Vector(0, -.2)
+    cache.test(box, wall, test)
+
+    assert len(calls) == 2
+
+
+def test_sleeping_contact_ends_when_its_sprite_is_removed():
+    group = Group("group")
+    box = get_body("box", (0, 390))
+    box.set_group(group)
+    box.physics.sleep()
+    wall = Wall((-100, 400), (100, 400))
+
+    events = []
+    box.on_contact_end = events.append
+
+    cache = ContactCache()
+    cache.add(wall, box, (0, 400))
+    cache.update()
+    cache.update()
+
+    assert len(cache.contacts) == 1
+    assert events == []
+
+    Layer.remove_sprite(box)
+    cache.update()
+
+    assert cache.contacts == {}
+    assert [e[con.OTHER] for e in events] == [wall]
@@ -0,0 +1,54 @@
+from zsquirrel.context import ApplicationInterface
+from zsquirrel.entities import Group
+from zsquirrel.tiles.tile_maps import TileMapGraphics
+
+
+class TileMapInterface(ApplicationInterface):
+    def __init__(self, *args):
+        super(TileMapInterface, self).__init__(*args)
+
+        self.init_order = [
+            self.set_tile_map.__name__,
+            self.set_tile_walls.__name__
+        ]
+
+    # data = {
+    #   "tile_size":    w, h            size of each tile in pixels
+    #   "size":         cols, rows      map dimensions in tiles
+    #   "tiles":        [int, ...]      flat list or list of rows
+    #   "chunk_size":   int             tiles per chunk side        optional
+    #   "max_chunks":   int             cached chunk surfaces       optional
+    # }
+    def set_tile_map(self, layer, sprite_sheet, data):
+        if type(data) is str:
+            data = self.context.load_resource(data)
+
+        layer.set_tile_size(*data["tile_size"])
+        if "chunk_size" in data:
+            layer.set_chunk_size(data["chunk_size"])
+
+        cols, rows = data["size"]
+        layer.set_tiles(cols, rows, data["tiles"])
+
+        graphics = TileMapGraphics(
+            layer, self.context.load_resource(sprite_sheet)
+        )
+        if "max_chunks" in data:
+            graphics.max_chunks = data["max_chunks"]
+
+        layer.graphics = graphics
+
+    def set_tile_walls(self, layer, group, *solid):
+        if type(group) is str:
+            name = group
+            group = self.context.model.get(name)
+
+            if group is None:
+                group = Group(name)
+                self.context.set_value(name, group)
+
+        if not solid:
+            solid = None
+
+        for wall in layer.get_walls(solid):
+            group.add_member(wall)
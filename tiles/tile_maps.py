@@ -0,0 +1,301 @@
+from array import array
+from collections import OrderedDict
+from zsquirrel.entities import Layer
+from zsquirrel.graphics import Graphics
+from zsquirrel.resources import Image
+from zsquirrel.utils.geometry import Rect, Wall, add_points
+
+EMPTY_TILE = 0
+DEFAULT_CHUNK_SIZE = 16
+DEFAULT_MAX_CHUNKS = 64
+
+
+class TileMapGraphics(Graphics):
+    def __init__(self, entity, sheet):
+        super(TileMapGraphics, self).__init__(entity)
+
+        self.sheet = sheet
+        self.cells = []
+        self.chunks = OrderedDict()
+        self.max_chunks = DEFAULT_MAX_CHUNKS
+
+        self.set_cells()
+
+    # tile index n (n > 0) draws the (n - 1)th cell of the sprite sheet,
+    # counting left to right, top to bottom
+    def set_cells(self):
+        tw, th = self.entity.tile_size
+        sw, sh = self.sheet.get_size()
+
+        self.cells = [None]
+        for y in range(0, sh - th + 1, th):
+            for x in range(0, sw - tw + 1, tw):
+                self.cells.append(
+                    self.sheet.subsurface(Rect((tw, th), (x, y)))
+                )
+
+        self.clear_chunks()
+
+    def clear_chunks(self):
+        self.chunks = OrderedDict()
+
+    def clear_chunk(self, cx, cy):
+        self.chunks.pop((cx, cy), None)
+
+    def get_chunk(self, cx, cy):
+        chunks = self.chunks
+        key = cx, cy
+
+        if key in chunks:
+            chunks.move_to_end(key)
+
+            return chunks[key]
+
+        chunk = self.render_chunk(cx, cy)
+        chunks[key] = chunk
+
+        if len(chunks) > self.max_chunks:
+            chunks.popitem(last=False)
+
+        return chunk
+
+    def render_chunk(self, cx, cy):
+        entity = self.entity
+        cells = self.cells
+        tiles = entity.tiles
+        cols, rows = entity.map_size
+        tw, th = entity.tile_size
+        n = entity.chunk_size
+
+        c0, r0 = cx * n, cy * n
+        c1, r1 = min(c0 + n, cols), min(r0 + n, rows)
+
+        chunk = Image.get_surface(((c1 - c0) * tw, (r1 - r0) * th))
+
+        for r in range(r0, r1):
+            i = r * cols
+            y = (r - r0) * th
+
+            for c in range(c0, c1):
+                t = tiles[i + c]
+
+                if t != EMPTY_TILE and t < len(cells):
+                    chunk.blit(cells[t], ((c - c0) * tw, y))
+
+        return chunk
+
+    def get_chunk_range(self, offset):
+        entity = self.entity
+        cw, ch = entity.get_chunk_pixel_size()
+        cols, rows = entity.get_chunk_count()
+        view = entity.get_view_size()
+
+        if view is None:
+            return 0, 0, cols, rows
+
+        ox, oy = offset
+        vw, vh = view
+        x0, y0 = -ox, -oy
+
+        return (
+            max(int(x0 // cw), 0), max(int(y0 // ch), 0),
+            min(int((x0 + vw) // cw) + 1, cols),
+            min(int((y0 + vh) // ch) + 1, rows)
+        )
+
+    def get_graphics(self, offset):
+        offset = add_points(offset, self.entity.position)
+        ox, oy = offset
+        cw, ch = self.entity.get_chunk_pixel_size()
+        c0, r0, c1, r1 = self.get_chunk_range(offset)
+
+        args = []
+
+        for cy in range(r0, r1):
+            for cx in range(c0, c1):
+                args.append((
+                    self.get_chunk(cx, cy),
+                    (ox + (cx * cw), oy + (cy * ch))
+                ))
+
+        return args
+
+
+class TileMapLayer(Layer):
+    def __init__(self, name):
+        """
+        TileMapLayer objects store a grid of tile indices in a compact
+        array and draw them as fixed-size 'chunks' of tiles that are
+        pre-rendered to cached surfaces by a TileMapGraphics object.
+
+        Only the chunks that intersect the view of the 'camera' layer
+        (or the explicit 'view_size') are drawn each frame, so the cost
+        of rendering is bound by the size of the screen rather than the
+        size of the map.
+
+        A tile index of 0 is an empty tile. Any other index n refers to the
+        (n - 1)th cell of the sprite sheet set by TileMapInterface.
+
+        :param name: str
+        """
+        super(TileMapLayer, self).__init__(name)
+
+        self.tile_size = 1, 1
+        self.map_size = 0, 0
+        self.chunk_size = DEFAULT_CHUNK_SIZE
+        self.tiles = array("H")
+
+        self.camera = None
+        self.view_size = None
+
+    def set_tile_size(self, w, h):
+        self.tile_size = w, h
+
+        if self.graphics:
+            self.graphics.set_cells()
+
+    def set_chunk_size(self, value):
+        self.chunk_size = value
+
+        if self.graphics:
+            self.graphics.clear_chunks()
+
+    def set_tiles(self, cols, rows, tiles):
+        """
+        Sets the map dimensions and tile indices. The 'tiles' argument
+        can be either a flat list of cols * rows indices or a list of
+        rows.
+
+        :param cols: int
+        :param rows: int
+        :param tiles: list, [int, ...] or [[int, ...], ...]
+        """
+        if tiles and type(tiles[0]) is list:
+            flat = []
+            for row in tiles:
+                flat += row
+            tiles = flat
+
+        if len(tiles) != cols * rows:
+            raise ValueError("{} tiles passed to {} for a {}x{} map".format(
+                len(tiles), self, cols, rows
+            ))
+
+        self.map_size = cols, rows
+        self.tiles = array("H", tiles)
+
+        if self.graphics:
+            self.graphics.clear_chunks()
+
+    def set_camera(self, camera):
+        self.camera = camera
+
+    def set_view_size(self, w, h):
+        self.view_size = w, h
+
+    def get_view_size(self):
+        if self.camera:
+            return self.camera.world_size
+
+        return self.view_size
+
+    def get_chunk_pixel_size(self):
+        tw, th = self.tile_size
+        n = self.chunk_size
+
+        return tw * n, th * n
+
+    def get_chunk_count(self):
+        cols, rows = self.map_size
+        n = self.chunk_size
+
+        return -(-cols // n), -(-rows // n)
+
+    def get_tile(self, col, row):
+        cols, rows = self.map_size
+
+        if 0 <= col < cols and 0 <= row < rows:
+            return self.tiles[(row * cols) + col]
+
+        return EMPTY_TILE
+
+    def set_tile(self, col, row, value):
+        cols = self.map_size[0]
+        self.tiles[(row * cols) + col] = value
+
+        if self.graphics:
+            n = self.chunk_size
+            self.graphics.clear_chunk(col // n, row // n)
+
+    def get_tile_at(self, x, y):
+        px, py = self.position
+        tw, th = self.tile_size
+
+        return self.get_tile(
+            int((x - px) // tw), int((y - py) // th)
+        )
+
+    def get_walls(self, solid=None):
+        """
+        Returns a list of Wall objects tracing the outline of every solid
+        tile region. Adjacent tile edges are merged into a single Wall, and
+        each Wall is wound so that its normal faces out of the solid region.
+
+        :param solid: None or iterable of tile indices that count as solid.
+            By default every non-empty tile is solid.
+
+        :return: list, [Wall, ...]
+        """
+        if solid is None:
+            def is_solid(c, r):
+                return self.get_tile(c, r) != EMPTY_TILE
+        else:
+            solid = set(solid)
+
+            def is_solid(c, r):
+                return self.get_tile(c, r) in solid
+
+        cols, rows = self.map_size
+        tw, th = self.tile_size
+        px, py = self.position
+        walls = []
+
+        # each run is (start, end) in tiles along the edge being traced
+        def add_runs(edges, make_wall):
+            start = None
+
+            for i in range(len(edges) + 1):
+                edge = i < len(edges) and edges[i]
+
+                if edge and start is None:
+                    start = i
+
+                if not edge and start is not None:
+                    walls.append(make_wall(start, i))
+                    start = None
+
+        for r in range(rows):
+            y0, y1 = py + (r * th), py + ((r + 1) * th)
+            top = [is_solid(c, r) and not is_solid(c, r - 1) for c in range(cols)]
+            bottom = [is_solid(c, r) and not is_solid(c, r + 1) for c in range(cols)]
+
+            add_runs(top, lambda a, b: Wall(
+                (px + (a * tw), y0), (px + (b * tw), y0)
+            ))
+            add_runs(bottom, lambda a, b: Wall(
+                (px + (b * tw), y1), (px + (a * tw), y1)
+            ))
+
+        for c in range(cols):
+            x0, x1 = px + (c * tw), px + ((c + 1) * tw)
+            left = [is_solid(c, r) and not is_solid(c - 1, r) for r in range(rows)]
+            right = [is_solid(c, r) and not is_solid(c + 1, r) for r in range(rows)]
+
+            add_runs(left, lambda a, b: Wall(
+                (x0, py + (b * th)), (x0, py + (a * th))
+            ))
+            add_runs(right, lambda a, b: Wall(
+                (x1, py + (a * th)), (x1, py + (b * th))
+            ))
+
+        return walls
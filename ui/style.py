@@ -1,12 +1,13 @@
+from os.path import getsize
 from pygame.font import match_font, Font
 import pygame
 import zsquirrel.constants as con
+from zsquirrel.resources import ResourceLoader
 
 pygame.init()
 
 
 class Style:
-    LOADED_FONTS = {}
     DEFAULT_DATA = {
             con.BORDER_CORNERS: "",                     # 'a|b|c|d'
             con.BORDER_SIZE: con.DEFAULT_BORDER_SIZE,   # [int, int]
@@ -56,16 +57,17 @@ class Style:
     def get_data(self):
         return self.__dict__.copy()
 
-    @classmethod
-    def load_font(cls, name, size, bold, italic):
-        h_key = hash((name, size, bold, italic))
+    @staticmethod
+    def load_font(name, size, bold, italic):
+        cache = ResourceLoader.CACHE
+        key = name, size, bold, italic
+        font = cache.get(con.FONTS, key)
 
-        if h_key in cls.LOADED_FONTS:
-            return cls.LOADED_FONTS[h_key]
-
-        else:
+        if font is None:
             path = match_font(name, bold, italic)
             font = Font(path, size)
-            cls.LOADED_FONTS[h_key] = font
 
-            return font
+            file_size = getsize(path) if path else 0
+            cache.put(con.FONTS, key, font, size=file_size)
+
+        return font
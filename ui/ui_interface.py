@@ -6,8 +6,6 @@ from zsquirrel.ui.style import Style
 from zsquirrel.ui.flex import MemberTable
 from zsquirrel.ui.ui_graphics import TextGraphics, ContainerGraphics
 
-PRE_RENDERS = {}
-
 
 class UiGraphicsInterface(ApplicationInterface):
     def __init__(self, *args):
@@ -44,30 +42,24 @@ class UiGraphicsInterface(ApplicationInterface):
         tile = sprite.style.bg_image
 
         if tile:
-            if tile not in PRE_RENDERS:
-                PRE_RENDERS[tile] = self.get_tile_render(tile)
-
-            tile_render = PRE_RENDERS[tile]
+            tile_render = self.get_pre_render(
+                tile, lambda: self.get_tile_render(tile)
+            )
 
         border_images = None
         border = sprite.style.border
 
         if border and sprite.style.border_images:
             h_side, v_side, corner = sprite.style.border_images
-
-            if h_side not in PRE_RENDERS:
-                PRE_RENDERS[h_side] = self.get_border_render(
-                    h_side, con.SIDE_CHOICES[1]
-                )
-
-            if v_side not in PRE_RENDERS:
-                PRE_RENDERS[v_side] = self.get_border_render(
-                    v_side, con.SIDE_CHOICES[0]
-                )
+            t, l, r, b = con.SIDE_CHOICES
 
             border_images = (
-                PRE_RENDERS[h_side],
-                PRE_RENDERS[v_side],
+                self.get_pre_render(
+                    (h_side, l), lambda: self.get_border_render(h_side, l)
+                ),
+                self.get_pre_render(
+                    (v_side, t), lambda: self.get_border_render(v_side, t)
+                ),
                 self.context.load_resource(corner)
             )
 
@@ -76,6 +68,16 @@ class UiGraphicsInterface(ApplicationInterface):
             border_images=border_images
         )
 
+    def get_pre_render(self, key, render):
+        cache = self.context.resource_loader.cache
+        image = cache.get(con.PRE_RENDERS, key)
+
+        if image is None:
+            image = render()
+            cache.put(con.PRE_RENDERS, key, image)
+
+        return image
+
     def get_tile_render(self, file_name):
         tile = self.context.load_resource(file_name)
         sw, sh = self.context.game.screen.size
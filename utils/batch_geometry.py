@@ -0,0 +1,192 @@
+# The batch_geometry.py module provides vectorized versions of the collision and
+# distance tests defined in geometry.py, computed with NumPy over arrays of
+# segments, rects, points and rays.
+#
+# Segments are stored as rows of (ox, oy, i, j), i.e. a Wall's origin followed by
+# its vector, rects as rows of (x, y, w, h), and points and rays as rows of (x, y)
+# and (i, j). Every test is computed for every combination of its two inputs and
+# returns arrays with one row per segment or rect and one column per point or ray,
+# so a whole group of walls can be tested against every sprite in a single call.
+
+import numpy as np
+
+# the bounds checks of Wall.vector_collision allow each point to be
+# up to 1 pixel outside of either segment
+DEFAULT_SLACK = 1
+
+
+def get_point_array(points):
+    """
+    :param points: iterable, [(x, y), ...]
+
+    :return: ndarray, shape (n, 2)
+    """
+    return np.array(points, dtype=float).reshape(-1, 2)
+
+
+def get_vector_array(vectors):
+    """
+    :param vectors: iterable, [Vector, ...]
+
+    :return: ndarray, shape (n, 2)
+    """
+    return get_point_array([v.get_value() for v in vectors])
+
+
+def get_segment_array(walls):
+    """
+    :param walls: iterable, [Wall, ...]
+
+    :return: ndarray, shape (n, 4), rows of (ox, oy, i, j)
+    """
+    return np.array(
+        [tuple(w.origin) + w.get_value() for w in walls], dtype=float
+    ).reshape(-1, 4)
+
+
+def get_rect_array(rects):
+    """
+    :param rects: iterable, [Rect, ...]
+
+    :return: ndarray, shape (n, 4), rows of (x, y, w, h)
+    """
+    return np.array(
+        [tuple(r.position) + tuple(r.size) for r in rects], dtype=float
+    ).reshape(-1, 4)
+
+
+def get_normals(segments):
+    """
+    Returns the unit normal of each segment, matching Wall.get_normal_xy()
+
+    :param segments: ndarray, shape (n, 4)
+
+    :return: ndarray, shape (n, 2)
+    """
+    i, j = segments[:, 2], segments[:, 3]
+    m = np.hypot(i, j)
+    zero = m == 0
+    m[zero] = 1
+
+    normals = np.stack((j / m, -i / m), axis=1)
+    normals[zero] = 0, -1
+
+    return normals
+
+
+def in_bounds(x, y, ox, oy, i, j, slack=DEFAULT_SLACK):
+    # checks points against the bounding box of a segment, plus the slack
+    x0, x1 = np.minimum(ox, ox + i), np.maximum(ox, ox + i)
+    y0, y1 = np.minimum(oy, oy + j), np.maximum(oy, oy + j)
+
+    return (
+        (x0 - slack <= x) & (x <= x1 + slack) &
+        (y0 - slack <= y) & (y <= y1 + slack)
+    )
+
+
+def segment_intersections(segments, origins, vectors, slack=DEFAULT_SLACK):
+    """
+    Returns the collision point of every segment with every ray, as in
+    Wall.vector_collision(vector, origin). Pairs that are parallel or whose
+    axis collision falls outside either segment's bounds are masked out.
+
+    :param segments: ndarray, shape (n, 4)
+    :param origins: ndarray, shape (m, 2), the origin of each ray
+    :param vectors: ndarray, shape (m, 2), the vector of each ray
+    :param slack: int or float, bounds tolerance
+
+    :return: (ndarray, ndarray), the collision points with shape (n, m, 2)
+        and a bool mask of collisions with shape (n, m)
+    """
+    ox, oy = segments[:, 0, None], segments[:, 1, None]
+    i, j = segments[:, 2, None], segments[:, 3, None]
+    px, py = origins[None, :, 0], origins[None, :, 1]
+    ri, rj = vectors[None, :, 0], vectors[None, :, 1]
+
+    cross = (i * rj) - (j * ri)
+    parallel = cross == 0
+    cross = np.where(parallel, 1, cross)
+
+    t = (((px - ox) * rj) - ((py - oy) * ri)) / cross
+    x = ox + (t * i)
+    y = oy + (t * j)
+
+    hits = ~parallel
+    hits &= in_bounds(x, y, ox, oy, i, j, slack)
+    hits &= in_bounds(x, y, px, py, ri, rj, slack)
+
+    return np.stack((x, y), axis=-1), hits
+
+
+def normal_adjustments(segments, points, scale=1):
+    """
+    Returns the (dx, dy) displacement that moves every point onto the axis of
+    every segment along its normal, as in Wall.get_normal_adjustment()
+
+    :param segments: ndarray, shape (n, 4)
+    :param points: ndarray, shape (m, 2)
+    :param scale: int or float
+
+    :return: ndarray, shape (n, m, 2)
+    """
+    ox, oy = segments[:, 0, None], segments[:, 1, None]
+    i, j = segments[:, 2, None], segments[:, 3, None]
+    x, y = points[None, :, 0], points[None, :, 1]
+
+    m = (i * i) + (j * j)
+    zero = m == 0
+    m = np.where(zero, 1, m)
+
+    d = ((((x - ox) * j) - ((y - oy) * i)) / m) * scale
+    d = np.where(zero, 0, d)
+
+    return np.stack((-d * j, d * i), axis=-1)
+
+
+def points_in_rects(rects, points):
+    """
+    Returns whether every point is inside (or on the edge of) every rect,
+    as in Rect.get_circle_collision(0, point)
+
+    :param rects: ndarray, shape (n, 4)
+    :param points: ndarray, shape (m, 2)
+
+    :return: ndarray, bool, shape (n, m)
+    """
+    x, y = points[None, :, 0], points[None, :, 1]
+    l, t = rects[:, 0, None], rects[:, 1, None]
+    r, b = l + rects[:, 2, None], t + rects[:, 3, None]
+
+    return (l <= x) & (x <= r) & (t <= y) & (y <= b)
+
+
+def rect_distances(rects, points):
+    """
+    Returns the distance from every point to every rect, measured along the
+    line from the point to the rect's center as in Rect.get_distance(). Points
+    inside a rect have a distance of 0.
+
+    The distance is computed exactly, without the bounds slack used by
+    Wall.vector_collision.
+
+    :param rects: ndarray, shape (n, 4)
+    :param points: ndarray, shape (m, 2)
+
+    :return: ndarray, shape (n, m)
+    """
+    hw, hh = rects[:, 2, None] / 2, rects[:, 3, None] / 2
+    cx, cy = rects[:, 0, None] + hw, rects[:, 1, None] + hh
+    dx = np.abs(cx - points[None, :, 0])
+    dy = np.abs(cy - points[None, :, 1])
+
+    # the fraction of the line to the center that lies inside the rect
+    with np.errstate(divide="ignore"):
+        inside = np.minimum(
+            np.where(dx > 0, hw / dx, np.inf),
+            np.where(dy > 0, hh / dy, np.inf)
+        )
+
+    distances = np.hypot(dx, dy) * (1 - np.minimum(inside, 1))
+
+    return np.where(points_in_rects(rects, points), 0, distances)
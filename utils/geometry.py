@@ -43,6 +43,8 @@ def get_distance(p1, p2):
 
 
 class Rect:
+    __slots__ = "size", "position"
+
     def __init__(self, size, position=(0, 0)):
         self.size = size
         self.position = position
@@ -301,6 +303,8 @@ class Rect:
 
 
 class Vector:
+    __slots__ = "i_hat", "j_hat"
+
     def __init__(self, i_hat, j_hat):
         self.i_hat = i_hat
         self.j_hat = j_hat
@@ -319,9 +323,17 @@ class Vector:
         return sqrt(i ** 2 + j ** 2)
 
     def add_vector(self, vector):
-        c = self.complex + vector.complex
-        self.i_hat = c.real
-        self.j_hat = c.imag
+        self.i_hat += vector.i_hat
+        self.j_hat += vector.j_hat
+
+        return self
+
+    # In place, scalar argument methods. These don't create any temporary
+    # objects and should be preferred in per frame code.
+
+    def add_xy(self, i, j):
+        self.i_hat += i
+        self.j_hat += j
 
         return self
 
@@ -331,20 +343,52 @@ class Vector:
 
         return self
 
+    # Rotates the vector in place, given the cosine and sine of the angle in
+    # radians, following the same clockwise-on-screen convention as rotate()
+    def rotate_by_cos_sin(self, c, s):
+        i, j = self.i_hat, self.j_hat
+        self.i_hat = (i * c) + (j * s)
+        self.j_hat = (j * c) - (i * s)
+
+        return self
+
+    def dot(self, i, j):
+        return (self.i_hat * i) + (self.j_hat * j)
+
+    # Sets the vector to its projection onto the unit vector (ui, uj)
+    def project(self, ui, uj):
+        d = (self.i_hat * ui) + (self.j_hat * uj)
+        self.i_hat = d * ui
+        self.j_hat = d * uj
+
+        return self
+
+    # Removes the vector's component along the unit vector (ui, uj)
+    def reject(self, ui, uj):
+        d = (self.i_hat * ui) + (self.j_hat * uj)
+        self.i_hat -= d * ui
+        self.j_hat -= d * uj
+
+        return self
+
+    # Scales the vector's component along the unit vector (ui, uj) by a scalar
+    def scale_along_axis(self, ui, uj, scalar):
+        d = ((self.i_hat * ui) + (self.j_hat * uj)) * (scalar - 1)
+        self.i_hat += d * ui
+        self.j_hat += d * uj
+
+        return self
+
+    # Scales the vector's component in the direction of an angle in Tau * Radians
     def scale_in_direction(self, angle, scalar):
-        i, j = self.get_basis_vectors(angle)
-        m1 = Matrix.get_from_vectors(i, j)
-
-        m2 = Matrix([
-            [scalar, 0],
-            [0, 1]
-        ])
-        m = Matrix(m2.multiply_matrix(m1))
-
-        i, j = m.multiply_vector(self)
-        self.i_hat = i
-        self.j_hat = j
-        self.rotate(angle)
+        return self.scale_along_axis(*self.get_unit_xy(angle), scalar)
+
+    # Returns the unit vector for an angle in Tau * Radians as an (i, j) tuple
+    @staticmethod
+    def get_unit_xy(angle):
+        theta = angle * (2 * pi)
+
+        return cos(theta), -sin(theta)
 
     @staticmethod
     def get_basis_vectors(angle):
@@ -355,15 +399,19 @@ class Vector:
         return i, j
 
     def multiply(self, vector):
-        c = self.complex * vector.complex
-        self.i_hat = c.real
-        self.j_hat = c.imag
+        i, j = self.i_hat, self.j_hat
+        vi, vj = vector.i_hat, vector.j_hat
+        self.i_hat = (i * vi) - (j * vj)
+        self.j_hat = (i * vj) + (j * vi)
 
         return self
 
     # Returns the vector's angle in Tau * Radians
     def get_angle(self):
-        i, j = self.get_value()
+        return self.get_angle_xy(self.i_hat, self.j_hat)
+
+    @staticmethod
+    def get_angle_xy(i, j):
         angle = atan2(-j, i) / (2 * pi)  # NOTE: Multiply j value by -1 because down is positive
 
         if angle >= 0:
@@ -401,11 +449,8 @@ class Vector:
     # Alters vector values in place to rotate its angle by a given Tau * Radians value
     def rotate(self, theta):
         theta *= (2 * pi)
-        i, j = cos(theta), sin(theta)
 
-        self.multiply(Vector(i, -j))
-
-        return self
+        return self.rotate_by_cos_sin(cos(theta), sin(theta))
 
     # Returns the vector's displacement values applied to a point.
     def apply_to_point(self, point=(0, 0)):
@@ -460,7 +505,10 @@ class Vector:
         return c
 
     def check_orientation(self, vector):
-        t1, t2 = self.get_angle(), vector.get_angle()
+        return self.check_orientation_xy(vector.i_hat, vector.j_hat)
+
+    def check_orientation_xy(self, i, j):
+        t1, t2 = self.get_angle(), self.get_angle_xy(i, j)
 
         def compare_angles(a1, a2):
             top = a1 + .25
@@ -481,6 +529,8 @@ class Vector:
 
 
 class Wall(Vector):
+    __slots__ = "origin",
+
     def __init__(self, origin, end):
         ox, oy = origin
         fx, fy = end
@@ -537,11 +587,17 @@ class Wall(Vector):
         return Rect((w, h), (px, py))
 
     def get_normal(self):
-        normal = Vector(1, 0)
-        normal.set_angle(self.get_angle())
-        normal.rotate(.25)
+        return Vector(*self.get_normal_xy())
+
+    # Returns the wall's unit normal as an (i, j) tuple
+    def get_normal_xy(self):
+        i, j = self.i_hat, self.j_hat
+        m = sqrt((i * i) + (j * j))
 
-        return normal
+        if m == 0:
+            return 0.0, -1.0
+
+        return j / m, -i / m
 
     def get_copy(self, rotate=0.0, scale=1):
         v = super(Wall, self).get_copy(rotate=rotate, scale=scale)
@@ -617,19 +673,25 @@ class Wall(Vector):
         else:
             return False
 
+    # Returns the (dx, dy) displacement that moves a point onto the wall's axis
+    # along its normal
     def get_normal_adjustment(self, point, scale=1):
         x, y = point
-        normal = self.get_normal()
-        nx, ny = self.axis_collision(
-            normal, (x, y))
 
-        dx = x - nx
-        dx *= scale
-        dy = y - ny
-        dy *= scale
-        adjustment = Vector(-dx, -dy)
+        return self.get_normal_adjustment_xy(x, y, scale)
 
-        return adjustment.get_value()
+    def get_normal_adjustment_xy(self, x, y, scale=1):
+        i, j = self.i_hat, self.j_hat
+        m = (i * i) + (j * j)
+
+        if m == 0:
+            return 0, 0
+
+        ox, oy = self.origin
+        d = (((x - ox) * j) - ((y - oy) * i)) / m
+        d *= scale
+
+        return -d * j, d * i
 
 
 class Matrix:
@@ -637,6 +699,8 @@ class Matrix:
     #  [b, d]]
     # i_hat = ax + by       ae + bg     af + bh
     # j_hat = cx + dy       ce + dg     cf + dh
+    __slots__ = "values", "a", "b", "c", "d"
+
     def __init__(self, values):
         self.values = values
 